@@ -12,103 +12,214 @@
 # VERSION - Update this for each release
 __version__ = "1.1.1"
 
+from time import perf_counter
+_STARTED = perf_counter()   # For --startup-profile: when als2mid began loading, after interpreter startup
+
+# Only light modules are imported here. The XML parser, ZIP/gzip readers,
+# MIDIUtil, argparse, the probe and library index, worker pools and the
+# server are imported by the code that uses them, so the GUI, --version and
+# --use-server start quickly.
 import sys
 import os
-import xml.etree.ElementTree as ET
-from xml.etree.ElementTree import fromstring, ElementTree
-from zipfile import ZipFile, BadZipfile
-import gzip
-import binascii
-import argparse
+import io
+from functools import partial
+from contextlib import contextmanager, ExitStack
+
+from als2mid_cache import ConversionCache, DEFAULT_CACHE_SIZE_MB
+from als2mid_discovery import find_live_sets
+from als2mid_xml import read_live_set, xml_backend
+
+# Verbosity levels for convert_ableton_to_midi() and the --verbosity option
+QUIET = 0       # Errors, warnings and aggregate counts only
+SUMMARY = 1     # Plus one line per set and per MIDI file written
+VERBOSE = 2     # Plus per-track, per-clip, per-automation and per-skipped-note detail
+DEBUG = 3       # Plus event counts and phase timings
+VERBOSITY_LEVELS = {'quiet': QUIET, 'summary': SUMMARY, 'verbose': VERBOSE, 'debug': DEBUG}
+
+SERVER_PORT = 47820     # Default --port of the --serve conversion server
+SERVER_PRUNE_INTERVAL = 20  # --serve trims its cache to --cache-size after this many conversions
+
+TRACKS_PER_FILE = 16    # One track per MIDI channel; larger sets are split over several files
+
+# Ableton automation ID to MIDI CC mapping
+# Standard MIDI CCs that Ableton commonly uses
+AUTOMATION_MAP = {
+    16200: (0, 'Pitch Bend'),      # Special: Pitch Bend
+    16203: (1, 'Modulation'),      # CC 1
+    16111: (74, 'Filter Cutoff'),  # CC 74
+    16207: (7, 'Volume'),          # CC 7
+    16208: (10, 'Pan'),            # CC 10
+    16204: (64, 'Sustain'),        # CC 64
+    16205: (91, 'Reverb'),         # CC 91
+    16206: (93, 'Chorus'),         # CC 93
+    16112: (71, 'Resonance'),      # CC 71
+    16209: (11, 'Expression'),     # CC 11
+}
+
+# Options that change the MIDI output; part of the conversion cache key
+CACHE_OPTIONS = {'tracks_per_file': TRACKS_PER_FILE}
+# ConversionResult fields kept in the conversion cache
+CACHED_RESULT_FIELDS = ('status', 'tempo', 'track_count', 'note_count', 'skipped_note_count',
+                        'cc_count', 'pitch_bend_count', 'warnings')
+
+
+class ConversionResult:
+    """
+    Outcome of one convert_ableton_to_midi() call
+    
+    status is 'success' (MIDI written), 'no_midi' (the set has no MIDI notes)
+    or 'failed' (set by batch callers when the conversion raised).
+    """
+    
+    def __init__(self, input_file, status='failed', error=None):
+        self.input_file = input_file
+        self.status = status
+        self.error = error
+        self.output_files = []
+        self.tempo = None
+        self.track_count = 0
+        self.note_count = 0
+        self.skipped_note_count = 0
+        self.cc_count = 0
+        self.pitch_bend_count = 0
+        self.timings = {}       # Seconds per phase: 'parse', 'convert', 'write', 'total'
+        self.warnings = []
+        self.from_cache = False
+        self.midi_data = []     # Serialized MIDI files matching output_files (convert_bytes() only)
+        self.log = []           # Log messages collected by AsyncConverter
+    
+    def __repr__(self):
+        return (f'ConversionResult({self.input_file!r}, status={self.status!r}, '
+                f'files={len(self.output_files)}, tracks={self.track_count}, notes={self.note_count})')
+
+class ConversionError(Exception):
+    """A Live Set could not be converted; the message is the error that was logged"""
+
+
+class UnsupportedInputError(ConversionError):
+    """The input is not a .als file, or a .zip archive holding one"""
+
+
+class LiveSetParseError(ConversionError):
+    """The Live Set could not be decompressed or its XML could not be parsed"""
+
 
-# Import MIDIUtil 
-from midiutil_v1_2_1 import TICKSPERQUARTERNOTE, MIDIFile
+class MidiWriteError(ConversionError):
+    """None of the MIDI files could be written"""
 
-# Constants for detecting no-MIDI conversions
-NO_MIDI_ERROR_STRINGS = ["No MIDI tracks found", "Found 0 track(s)"]
 
-def is_no_midi_output(output_text):
-    """Check if conversion output indicates no MIDI tracks were found."""
-    return any(error_string in output_text for error_string in NO_MIDI_ERROR_STRINGS)
+def _discard_log(message):
+    """Logger that drops every message"""
 
-def convert_ableton_to_midi(input_file, output_file=None):
+
+@contextmanager
+def open_live_set(input_file, zip_member=None, log=print, data=None):
+    """
+    Open a Live Set as a binary XML stream without extracting anything to disk
+    
+    Gzipped (Gadget) sets - on disk or inside the archive - are decompressed
+    on the fly while the parser reads.
+    
+    Args:
+        input_file: Path to the .als file, or to the .zip archive holding it
+        zip_member: Name of the .als member when input_file is a ZIP archive
+        log: Callable that receives progress messages
+        data: Contents of input_file already read into memory (optional)
+    """
+    import gzip
+    from zipfile import ZipFile
+    
+    with ExitStack() as stack:
+        if zip_member is not None:
+            ablezip = stack.enter_context(ZipFile(io.BytesIO(data) if data is not None else input_file, 'r'))
+            raw = stack.enter_context(ablezip.open(zip_member))
+        elif data is not None:
+            raw = io.BufferedReader(io.BytesIO(data))
+        else:
+            raw = stack.enter_context(open(input_file, 'rb'))
+        
+        # Check if file is gzipped
+        if raw.peek(2)[:2] == b'\x1f\x8b':
+            log("Input is Gadget ALS file")
+            yield stack.enter_context(gzip.GzipFile(fileobj=raw, mode='rb'))
+        else:
+            log("Input is plain ALS file")
+            yield raw
+
+
+def write_midi_file(path, midi_data):
+    """Write serialized MIDI data to a file"""
+    with open(path, 'wb') as output:
+        output.write(midi_data)
+
+
+def convert_ableton_to_midi(input_file, output_file=None, log=print, verbosity=VERBOSE, data=None,
+                            write_output=write_midi_file, probe=False, in_memory=False):
     """
     Convert Ableton Live Set (.als) or zipped project to MIDI file
     
     Args:
         input_file: Path to .als or .zip file
         output_file: Optional output path for .mid file
+        log: Callable that receives progress messages (defaults to print)
+        verbosity: QUIET, SUMMARY, VERBOSE (default) or DEBUG; messages above
+            this level are never formatted
+        data: Contents of input_file already read into memory; the file
+            itself is then never opened
+        write_output: Callable(path, midi_bytes) that stores each MIDI file
+            (defaults to writing it to disk)
+        probe: Scan the raw bytes first and skip the XML parse when the set
+            has no note events (a 'no_midi' result, as the parse would give)
+        in_memory: write_output keeps or streams the MIDI data rather than
+            saving it, so the log says each file is ready instead of saved
+    
+    Returns:
+        ConversionResult describing what was written
+    
+    Raises:
+        UnsupportedInputError, LiveSetParseError, MidiWriteError or, for any
+        other failure, ConversionError itself, after logging the error
     """
+    try:
+        return _convert_ableton_to_midi(input_file, output_file, log, verbosity, data, write_output, probe,
+                                        in_memory)
+    except ConversionError:
+        raise
+    except Exception as e:
+        # Callers such as upload services rely on only ever seeing ConversionError
+        log(f'Error converting Live Set: {e}')
+        raise ConversionError(f'Error converting Live Set: {e}') from e
+
+
+def _convert_ableton_to_midi(input_file, output_file, log, verbosity, data, write_output, probe, in_memory):
+    """convert_ableton_to_midi() without the catch-all: raises only what it logged itself"""
+    from midiutil_v1_2_1 import TICKSPERQUARTERNOTE
+    from als2mid_notes import MAX_NOTE_TICKS, clip_note_ticks, safe_float, safe_int
+    from als2mid_tables import TrackTables, write_midi
+    
     if output_file is None:
         output_file = os.path.splitext(os.path.basename(input_file))[0] + ".mid"
     
+    result = ConversionResult(input_file)
+    started = perf_counter()
+    summary = verbosity >= SUMMARY
+    verbose = verbosity >= VERBOSE
+    debug = verbosity >= DEBUG
+    
     target_cc = -1
-    have_zip = False
-    have_gadget = False
-    gadget_contents = None
-
-    # Helper functions to safely parse XML attributes that may be missing
-    def safe_get(elem, name, default=None):
-        if elem is None:
-            return default
-        return elem.attrib.get(name, default)
-
-    def safe_int(s, default=0):
-        try:
-            if s is None:
-                return default
-            return int(float(s))
-        except Exception:
-            return default
-
-    def safe_float(s, default=0.0):
-        try:
-            if s is None:
-                return default
-            return float(s)
-        except Exception:
-            return default
+    skipped_event_count = 0
+    # Automation events, like notes, must land on ticks that fit the event tables' int64
+    max_event_beats = MAX_NOTE_TICKS / TICKSPERQUARTERNOTE
     
-    # Check if we have a ZIP archive
+    # Locate the Live Set: a member of the ZIP archive, or the file itself
     try:
-        with ZipFile(input_file) as zf:
-            print("Info: We have a real ZIP archive")
-            have_zip = True
-    except BadZipfile:
-        print("Info: It is an ALS or Gadget file")
-    
-    # Extract or read the file
-    if input_file.endswith(".zip") and have_zip:
-        print("Importing ZIP archive...")
-        with ZipFile(input_file, 'r') as ablezip:
-            # Filter out hidden files in any "__MACOSX" directories
-            list_of_files = ablezip.namelist()
-            infile = None
-            for elem in list_of_files:
-                if not elem.startswith("__") and elem.endswith(".als"):
-                    print(f'Found: {elem}')
-                    infile = ablezip.extract(elem)
-                    break
-            
-            if infile is None:
-                print("Error: No .als file found in ZIP archive")
-                sys.exit(1)
-                
-    elif input_file.endswith(".als"):
-        infile = input_file
-        with open(infile, 'rb') as test_f:
-            # Check if file is gzipped
-            if binascii.hexlify(test_f.read(2)) == b'1f8b':
-                print("Input is Gadget ALS file")
-                have_gadget = True
-                with gzip.open(input_file, 'rb') as f:
-                    # read returns bytes; decode to str
-                    gadget_contents = f.read().decode("utf-8")  # type: ignore
-            else:
-                print("Input is plain ALS file")
-    else:
-        print("Error: Filetype not supported. Please provide .als or .zip file")
-        sys.exit(1)
+        zip_member = find_zip_member(input_file, data, log if verbose else _discard_log)
+    except UnsupportedInputError as e:
+        log(str(e))
+        raise
+    except OSError as e:
+        log(f"Error reading Live Set: {e}")
+        raise LiveSetParseError(f"Error reading Live Set: {e}") from e
     
     # Initialise MIDI parameters
     track = 0
@@ -117,87 +228,76 @@ def convert_ableton_to_midi(input_file, output_file=None):
     tempo = 60      # In BPM
     
     toffset = 0     # For calculating time-offsets in multi scenes
-    timeoff = 0     # Store for temp offsets
     
-    # Parse the XML data
+    # Stream the XML data, unless a probe of the raw bytes shows there are no notes to find
+    open_log = log if verbose else _discard_log
     try:
-        if have_gadget:
-            if not gadget_contents:
-                print("Error: gadget contents empty or unreadable")
-                sys.exit(1)
-            tree = ElementTree(fromstring(gadget_contents))
-        else:
-            tree = ET.parse(str(infile))
+        live_set = None
+        if probe:
+            from als2mid_probe import probe_stream
+            
+            with open_live_set(input_file, zip_member, open_log, data) as source:
+                inventory = probe_stream(source, stop_at_notes=True)
+            open_log = _discard_log
+            if inventory['live_set'] and not inventory['has_notes']:
+                if debug:
+                    log('Probe found no MIDI notes, skipping the XML parse')
+                live_set = {
+                    'tempos': [inventory['tempo']] if inventory['tempo'] is not None else [],
+                    'midi_tracks': [],
+                    'total_tracks': inventory['midi_tracks'],
+                }
+        if live_set is None:
+            with open_live_set(input_file, zip_member, open_log, data) as source:
+                live_set = read_live_set(source)
     except Exception as e:
-        print(f"Error parsing XML: {e}")
-        sys.exit(1)
+        log(f"Error parsing XML: {e}")
+        raise LiveSetParseError(f"Error parsing XML: {e}") from e
     
-    # Validate parsed tree and root element
-    if tree is None:
-        print("Error: XML tree is empty")
-        sys.exit(1)
-
-    # ElementTree.getroot() should return an Element
-    root = tree.getroot()
-    if root is None:
-        print("Error: XML root is empty")
-        sys.exit(1)
+    parsed = perf_counter()
+    result.timings['parse'] = parsed - started
+    if debug:
+        log(f'XML backend: {xml_backend()}')
     
     # Get tempo/BPM from the Ableton file
-    for master in root.iter('Tempo'):
-        manual = master.find('Manual')
-        if manual is not None:
-            tempo = safe_int(manual.get('Value'), tempo)
-    
-    # Get amount of tracks to be allocated
-    num_tracks = 0
-    all_midi_tracks = []
-    for tracks in root.iter('Tracks'):
-        found = tracks.findall('MidiTrack') or []
-        
-        # Filter out tracks with no MIDI notes
-        tracks_with_notes = []
-        for mt in found:
-            has_notes = False
-            # Check all possible clip locations for notes
-            for clip in mt.findall('.//MidiClip'):
-                keytracks = clip.find('.//Notes/KeyTracks')
-                if keytracks is not None:
-                    for kt in keytracks.findall('KeyTrack'):
-                        notes = kt.find('Notes')
-                        if notes is not None and len(notes.findall('MidiNoteEvent')) > 0:
-                            has_notes = True
-                            break
-                if has_notes:
-                    break
-            
-            if has_notes:
-                tracks_with_notes.append(mt)
-        
-        all_midi_tracks = tracks_with_notes
-        num_tracks = len(all_midi_tracks)
-        total_tracks = len(found)
+    for manual_value in live_set['tempos']:
+        tempo = safe_int(manual_value, tempo)
+    result.tempo = tempo
+    
+    # Get amount of tracks to be allocated (tracks with no MIDI notes are left out)
+    all_midi_tracks = [miditrack for miditrack in live_set['midi_tracks'] if miditrack['has_notes']]
+    num_tracks = len(all_midi_tracks)
+    total_tracks = live_set['total_tracks']
+    if total_tracks is not None:
         if total_tracks > num_tracks:
-            print(f'Found {total_tracks} MIDI track(s), {num_tracks} with note data ({tempo} BPM)')
+            if summary:
+                log(f'Found {total_tracks} MIDI track(s), {num_tracks} with note data ({tempo} BPM)')
         else:
-            print(f'Found {num_tracks} track(s) with {tempo} BPM')
+            if summary:
+                log(f'Found {num_tracks} track(s) with {tempo} BPM')
     
     if num_tracks == 0:
-        print("Error: No MIDI tracks found")
-        return []  # Return empty list instead of exiting
+        log("Error: No MIDI tracks found")
+        result.status = 'no_midi'
+        result.timings['total'] = perf_counter() - started
+        return result
+    
+    result.track_count = num_tracks
     
     # Calculate how many MIDI files we need (16 tracks per file max)
-    tracks_per_file = 16
+    tracks_per_file = TRACKS_PER_FILE
     num_files = (num_tracks + tracks_per_file - 1) // tracks_per_file  # Ceiling division
     
     if num_files > 1:
-        print(f'Splitting into {num_files} MIDI files (16 channels per file)')
+        if summary:
+            log(f'Splitting into {num_files} MIDI files (16 channels per file)')
     
     output_files = []
     output_files = []
     
     # Process tracks in batches of 16
     for file_index in range(num_files):
+        file_started = perf_counter()
         start_track = file_index * tracks_per_file
         end_track = min(start_track + tracks_per_file, num_tracks)
         tracks_in_file = end_track - start_track
@@ -210,19 +310,17 @@ def convert_ableton_to_midi(input_file, output_file=None):
         else:
             current_output = output_file
         
-        print(f'\n{"=" * 60}')
-        print(f'Creating MIDI file: {current_output}')
-        print(f'Tracks {start_track} to {end_track - 1} ({tracks_in_file} tracks)')
-        print(f'{"=" * 60}')
-        
-        # Prepare the target MIDI file - format 1 (multi-track)
-        my_midi = MIDIFile(tracks_in_file, removeDuplicates=True, deinterleave=False,
-                          adjust_origin=False, file_format=1, 
-                          ticks_per_quarternote=TICKSPERQUARTERNOTE)
+        if verbose:
+            log(f'\n{"=" * 60}')
+            log(f'Creating MIDI file: {current_output}')
+            log(f'Tracks {start_track} to {end_track - 1} ({tracks_in_file} tracks)')
+            log(f'{"=" * 60}')
         
-        # Add tempo
-        my_midi.addTempo(track=0, time=0, tempo=tempo)
-        print(f'Set tempo: {tempo} BPM')
+        # Tables for each track of the target MIDI file - format 1 (multi-track),
+        # with the tempo written to its first track
+        file_tracks = []
+        if verbose:
+            log(f'Set tempo: {tempo} BPM')
         
         # Track device-specific automation IDs we've seen and assign them CCs
         # This must be outside the track loop so IDs get unique CCs across all tracks
@@ -237,204 +335,790 @@ def convert_ableton_to_midi(input_file, output_file=None):
         # Process MIDI tracks for this file
         # In format 1: track 0 = tempo track (automatic), user tracks start at index 0
         for global_track_idx in range(start_track, end_track):
-            local_track = global_track_idx - start_track  # Track index within this MIDI file
             miditrack = all_midi_tracks[global_track_idx]
             
             # Reset the time offset data
             toffset = 0
-            timeoff = 0
             
             # Get track data (name, etc)
-            name_elem = miditrack.find('.//Name/EffectiveName')
-            trackname = safe_get(name_elem, 'Value', f'Track {global_track_idx + 1}')
-            print(f'\nProcessing track {global_track_idx}: {trackname}')
-            my_midi.addTrackName(local_track, 0, trackname)
-            
-            # Process both session view clips AND arranger clips
-            clips_to_process = []
-            
-            # Check Ableton 12 TakeLanes structure (newer format)
-            take_lanes = miditrack.find('.//TakeLanes/TakeLanes')
-            if take_lanes is not None:
-                for take_lane in take_lanes.findall('TakeLane'):
-                    clip_automation = take_lane.find('ClipAutomation/Events')
-                    if clip_automation is not None:
-                        clips_to_process.extend(clip_automation.findall('MidiClip'))
+            trackname = miditrack['name']
+            if trackname is None:
+                trackname = f'Track {global_track_idx + 1}'
+            if verbose:
+                log(f'\nProcessing track {global_track_idx}: {trackname}')
+            track_tables = TrackTables(trackname, channel)
+            file_tracks.append(track_tables)
             
-            # Check arranger timeline clips (Ableton 11 and earlier)
-            arranger = miditrack.find('.//MainSequencer/ClipTimeable/ArrangerAutomation/Events')
-            if arranger is not None:
-                clips_to_process.extend(arranger.findall('MidiClip'))
-            
-            # Also check session view clip slots (for live performance clips - Ableton 11 and earlier)
-            for clipslot in miditrack.findall('.//MainSequencer/ClipSlotList/ClipSlot'):
-                for clip_value in clipslot.findall('.//ClipSlot/Value/MidiClip'):
-                    clips_to_process.append(clip_value)
-            
-            # Process all found clips
-            for midiclip in clips_to_process:
+            # Process all found clips (Ableton 12 TakeLanes, arranger, then session clip slots)
+            for midiclip in miditrack['clips']:
                 # Get the clip's position in the arranger timeline
                 # The Time attribute on MidiClip contains the arranger start position
-                clip_start_time = safe_float(midiclip.attrib.get('Time'), 0.0)
+                clip_start_time = safe_float(midiclip['time'], 0.0)
                 
                 # Alternative: read from CurrentStart element if Time attribute is missing
-                if clip_start_time == 0.0:
-                    current_start_elem = midiclip.find('.//CurrentStart')
-                    if current_start_elem is not None:
-                        clip_start_time = safe_float(safe_get(current_start_elem, 'Value'), 0.0)
+                if clip_start_time == 0.0 and midiclip['current_start'] is not None:
+                    clip_start_time = safe_float(midiclip['current_start'], 0.0)
                 
                 # Use the clip's actual start time as offset
                 toffset = clip_start_time
                 
-                # Get the clip length (for reference, not used for offset anymore)
-                for loopinfo in midiclip.findall('.//Loop'):
-                    le = loopinfo.find('LoopEnd')
-                    timeoff = safe_float(safe_get(le, 'Value'), timeoff)
-                
                 # Process notes
                 # Structure: MidiClip/Notes/KeyTracks/KeyTrack
-                keytracks_container = midiclip.find('.//Notes/KeyTracks')
-                if keytracks_container is not None:
-                    keytracks_list = keytracks_container.findall('KeyTrack')
+                keytracks_list = midiclip['keytracks']
+                if keytracks_list is not None:
                     if len(keytracks_list) > 0:
-                        note_count = sum(len(kt.findall('Notes/MidiNoteEvent')) for kt in keytracks_list)
-                        if note_count > 0:
-                            print(f'\tFound {note_count} notes across {len(keytracks_list)} key tracks')
-
-                    for keytrack in keytracks_list:
-                        # Get the MIDI key (pitch) - direct child of KeyTrack
-                        key_elem = keytrack.find('MidiKey')
-                        keyt = safe_int(safe_get(key_elem, 'Value'))
-                        if keyt is None:
-                            continue
+                        note_count = sum(len(notes or ()) for _, notes in keytracks_list)
+                        if verbose and note_count > 0:
+                            log(f'\tFound {note_count} notes across {len(keytracks_list)} key tracks')
 
-                        # Get the notes - KeyTrack/Notes/MidiNoteEvent
-                        notes_container = keytrack.find('Notes')
-                        if notes_container is None:
-                            continue
-                        notes_in_track = notes_container.findall('MidiNoteEvent')
-                        for notes in notes_in_track:
-                            tim = safe_float(notes.attrib.get('Time')) + float(toffset)
-                            dur = safe_float(notes.attrib.get('Duration'))
-                            vel = safe_int(notes.attrib.get('Velocity'))
-                            
-                            # Minimum note duration: 1/96th of a quarter note (0.0104166... beats)
-                            MIN_NOTE_DURATION = 1.0 / 96.0
-                            
-                            # Clamp duration to minimum if it's ridiculously short but non-zero
-                            if 0 < dur < MIN_NOTE_DURATION:
-                                dur = MIN_NOTE_DURATION
-                            
-                            # Validate MIDI values are in proper range
-                            # Duration must be > 0, time must be >= 0
-                            # Key must be 0-127, velocity must be 1-127 (0 is note off)
-                            if (0 <= keyt <= 127 and 
-                                1 <= vel <= 127 and 
-                                dur > 0 and 
-                                tim >= 0):
-                                my_midi.addNote(local_track, channel, keyt, tim, dur, vel)
-                            else:
-                                print(f'\t\tSkipped invalid note: key={keyt}, vel={vel}, dur={dur}, time={tim}')
+                    # The whole clip's notes are offset, clamped to the minimum
+                    # duration, validated (key 0-127, velocity 1-127, duration > 0,
+                    # time >= 0) and converted to ticks as columns
+                    ticks, durations, pitches, velocities, skipped = clip_note_ticks(
+                        keytracks_list, toffset, TICKSPERQUARTERNOTE)
+                    if pitches:
+                        track_tables.add_notes(ticks, durations, pitches, velocities)
+                        result.note_count += len(pitches)
+                    result.skipped_note_count += len(skipped)
+                    if verbose:
+                        for keyt, vel, dur, tim in skipped:
+                            log(f'\t\tSkipped invalid note: key={keyt}, vel={vel}, dur={dur}, time={tim}')
                 
                 # Get automation data
-                for envelopes in midiclip.findall('.//Envelopes/Envelopes'):
-                    for clipenv in envelopes:
-                        # Get the automation internal ID
-                        pid = clipenv.find('.//EnvelopeTarget/PointeeId')
-                        autoid = safe_int(safe_get(pid, 'Value'), -1)
-                        
-                        # Ableton automation ID to MIDI CC mapping
-                        # Standard MIDI CCs that Ableton commonly uses
-                        AUTOMATION_MAP = {
-                            16200: (0, 'Pitch Bend'),      # Special: Pitch Bend
-                            16203: (1, 'Modulation'),      # CC 1
-                            16111: (74, 'Filter Cutoff'),  # CC 74
-                            16207: (7, 'Volume'),          # CC 7
-                            16208: (10, 'Pan'),            # CC 10
-                            16204: (64, 'Sustain'),        # CC 64
-                            16205: (91, 'Reverb'),         # CC 91
-                            16206: (93, 'Chorus'),         # CC 93
-                            16112: (71, 'Resonance'),      # CC 71
-                            16209: (11, 'Expression'),     # CC 11
-                        }
-                        
-                        target_cc = -1
-                        cc_name = 'Unknown'
-                        
-                        if autoid in AUTOMATION_MAP:
-                            target_cc, cc_name = AUTOMATION_MAP[autoid]
-                            print(f'\tFound automation: {cc_name} (CC {target_cc if target_cc != 0 else "Pitch Bend"})')
-                        elif autoid != -1:
-                            # Unknown/device-specific automation - map to unused CC
-                            if autoid not in device_automation_map:
-                                if next_unused_cc_index < len(SAFE_UNUSED_CCS):
-                                    device_automation_map[autoid] = SAFE_UNUSED_CCS[next_unused_cc_index]
-                                    next_unused_cc_index += 1
-                                    target_cc = device_automation_map[autoid]
-                                    print(f'\tFound device-specific automation ID {autoid} - mapped to CC {target_cc}')
-                                else:
-                                    print(f'\tFound device-specific automation ID {autoid} - no free CCs available, skipping')
-                                    target_cc = -1
-                            else:
+                for pointee_id, automation_events in midiclip['envelopes']:
+                    # Get the automation internal ID
+                    autoid = safe_int(pointee_id, -1)
+                    
+                    target_cc = -1
+                    cc_name = 'Unknown'
+                    
+                    if autoid in AUTOMATION_MAP:
+                        target_cc, cc_name = AUTOMATION_MAP[autoid]
+                        if verbose:
+                            log(f'\tFound automation: {cc_name} (CC {target_cc if target_cc != 0 else "Pitch Bend"})')
+                    elif autoid != -1:
+                        # Unknown/device-specific automation - map to unused CC
+                        if autoid not in device_automation_map:
+                            if next_unused_cc_index < len(SAFE_UNUSED_CCS):
+                                device_automation_map[autoid] = SAFE_UNUSED_CCS[next_unused_cc_index]
+                                next_unused_cc_index += 1
                                 target_cc = device_automation_map[autoid]
+                                if verbose:
+                                    log(f'\tFound device-specific automation ID {autoid} - mapped to CC {target_cc}')
+                            else:
+                                if verbose:
+                                    log(f'\tFound device-specific automation ID {autoid} - no free CCs available, skipping')
+                                result.warnings.append(f'No free CC for device-specific automation ID {autoid} on track {global_track_idx}')
+                                target_cc = -1
+                        else:
+                            target_cc = device_automation_map[autoid]
+
+                    # Get the automation values for each envelope
+                    if target_cc != -1:
+                        for event_time, event_value in automation_events:
+                            cc_tim = safe_float(event_time)
+                            cc_val = safe_int(event_value)
+
+                            if cc_tim < 0:
+                                cc_tim = 0
+                            elif not cc_tim < max_event_beats:
+                                # Too late for a tick, infinite or NaN
+                                skipped_event_count += 1
+                                if verbose:
+                                    log(f'\t\tSkipped automation event: time={cc_tim}, value={event_value}')
+                                continue
 
-                        # Get the automation values for each envelope
-                        if target_cc != -1:
-                            for automs in clipenv.findall('.//Automation/Events'):
-                                for aevents in automs:
-                                    eventvals = aevents.attrib or {}
-                                    cc_tim = safe_float(eventvals.get('Time'))
-                                    cc_val = safe_int(eventvals.get('Value'))
-
-                                    if cc_tim < 0:
-                                        cc_tim = 0
-
-                                    # Write pitchbend information (range: -8192 to 8191)
-                                    if target_cc == 0:
-                                        pitch_val = max(-8192, min(8191, cc_val))
-                                        my_midi.addPitchWheelEvent(local_track, channel, cc_tim, pitch_val)
-
-                                    # Write other CC values (range: 0 to 127)
-                                    else:
-                                        cc_val = max(0, min(127, cc_val))
-                                        my_midi.addControllerEvent(local_track, channel, cc_tim, target_cc, cc_val)
+                            # Write pitchbend information (range: -8192 to 8191)
+                            if target_cc == 0:
+                                pitch_val = max(-8192, min(8191, cc_val))
+                                track_tables.add_pitch_bend(int(cc_tim * TICKSPERQUARTERNOTE), pitch_val)
+                                result.pitch_bend_count += 1
+
+                            # Write other CC values (range: 0 to 127)
+                            else:
+                                cc_val = max(0, min(127, cc_val))
+                                track_tables.add_controller(int(cc_tim * TICKSPERQUARTERNOTE), target_cc, cc_val)
+                                result.cc_count += 1
+        
+        converted = perf_counter()
+        result.timings['convert'] = result.timings.get('convert', 0.0) + (converted - file_started)
         
         # Write this MIDI file
         try:
-            with open(current_output, 'wb') as output:
-                my_midi.writeFile(output)
+            midi_data = write_midi(file_tracks, tempo, TICKSPERQUARTERNOTE)
+            write_output(current_output, midi_data)
+            result.timings['write'] = result.timings.get('write', 0.0) + (perf_counter() - converted)
             
-            # Verify file was created and has content
-            if os.path.exists(current_output):
-                file_size = os.path.getsize(current_output)
-                print(f'\nDone! MIDI file saved to: {current_output}')
-                print(f'File size: {file_size} bytes')
-                
-                # Read first few bytes to verify MIDI header
-                with open(current_output, 'rb') as f:
-                    header = f.read(4)
-                    if header == b'MThd':
-                        print('MIDI header verified: Valid MIDI file')
-                    else:
-                        print(f'WARNING: Invalid MIDI header: {header}')
-                
-                output_files.append(current_output)
+            if summary:
+                if in_memory:
+                    log(f'\nDone! MIDI file ready: {current_output}')
+                else:
+                    log(f'\nDone! MIDI file saved to: {current_output}')
+            if verbose:
+                log(f'File size: {len(midi_data)} bytes')
+            
+            # Verify the MIDI header of what was written
+            header = midi_data[:4]
+            if header == b'MThd':
+                if verbose:
+                    log('MIDI header verified: Valid MIDI file')
             else:
-                print(f'ERROR: Output file was not created: {current_output}')
+                log(f'WARNING: Invalid MIDI header: {header}')
+                result.warnings.append(f'Invalid MIDI header in {current_output}: {header}')
+            
+            output_files.append(current_output)
         except Exception as e:
-            print(f'Error writing MIDI file {current_output}: {e}')
+            log(f'Error writing MIDI file {current_output}: {e}')
             import traceback
-            traceback.print_exc()
+            log(traceback.format_exc())
+            result.warnings.append(f'Error writing MIDI file {current_output}: {e}')
     
     # Return list of created files
     if len(output_files) == 0:
-        print('ERROR: No output files were created')
-        sys.exit(1)
+        log('ERROR: No output files were created')
+        raise MidiWriteError('ERROR: No output files were created')
+    
+    result.status = 'success'
+    result.output_files = output_files
+    result.timings['total'] = perf_counter() - started
+    
+    # Below verbose level skipped notes are reported once, as a count
+    if result.skipped_note_count:
+        result.warnings.append(f'Skipped {result.skipped_note_count} invalid note(s)')
+        if not verbose:
+            log(f'Skipped {result.skipped_note_count} invalid note(s)')
+    if skipped_event_count:
+        result.warnings.append(f'Skipped {skipped_event_count} automation event(s) with invalid times')
+        if not verbose:
+            log(f'Skipped {skipped_event_count} automation event(s) with invalid times')
+    
+    if debug:
+        log(f'Notes: {result.note_count}, CC events: {result.cc_count}, '
+            f'pitch bend events: {result.pitch_bend_count}')
+        log('Timings: ' + ', '.join(f'{phase} {seconds:.3f}s' for phase, seconds in result.timings.items()))
+    return result
+
+
+def find_zip_member(input_file, data=None, log=_discard_log):
+    """
+    Name of the Live Set inside a .zip input, or None for a .als file
+    
+    The input is opened once to check whether it is a ZIP archive. Members
+    in "__MACOSX"-style folders (names starting with "__") are skipped.
+    
+    Args:
+        input_file: Path to a .als file, or a .zip archive holding one
+        data: Contents of input_file already read into memory (optional)
+        log: Callable that receives the progress messages
+    
+    Raises:
+        UnsupportedInputError for other file types, .zip files that aren't
+        ZIP archives and archives without a .als file
+    """
+    from zipfile import ZipFile, BadZipfile
+    
+    try:
+        archive = ZipFile(io.BytesIO(data) if data is not None else input_file)
+    except BadZipfile:
+        archive = None
+        log("Info: It is an ALS or Gadget file")
+    else:
+        log("Info: We have a real ZIP archive")
+    
+    with archive or ExitStack():
+        if input_file.endswith(".zip") and archive is not None:
+            log("Importing ZIP archive...")
+            # Filter out hidden files in any "__MACOSX" directories
+            for name in archive.namelist():
+                if not name.startswith("__") and name.endswith(".als"):
+                    log(f'Found: {name}')
+                    return name
+            raise UnsupportedInputError("Error: No .als file found in ZIP archive")
+    
+    if not input_file.endswith(".als"):
+        raise UnsupportedInputError("Error: Filetype not supported. Please provide .als or .zip file")
+    return None
+
+
+def probe_live_set(input_file, data=None, stop_at_notes=False):
+    """
+    Triage a Live Set for MIDI content without parsing its XML
+    
+    Args:
+        input_file: Path to a .als file, or a .zip archive holding one
+        data: Contents of input_file already read into memory (optional)
+        stop_at_notes: Stop at the first note event found (enough to decide
+            whether the set needs converting; the counts are then partial)
+    
+    Returns:
+        Inventory dict from probe_stream(): 'live_set', 'midi_tracks',
+        'midi_clips', 'note_events', 'has_notes', 'tempo' and 'complete'
+    
+    Raises:
+        UnsupportedInputError or LiveSetParseError (both ConversionError)
+    """
+    from als2mid_probe import probe_stream
+    
+    try:
+        zip_member = find_zip_member(input_file, data)
+        with open_live_set(input_file, zip_member, _discard_log, data) as source:
+            return probe_stream(source, stop_at_notes=stop_at_notes)
+    except ConversionError:
+        raise
+    except Exception as e:
+        raise LiveSetParseError(f"Error reading Live Set: {e}") from e
+
+
+def index_live_set(input_file, data=None):
+    """
+    Read the metadata the library index keeps for a Live Set
+    
+    Args:
+        input_file: Path to a .als file, or a .zip archive holding one
+        data: Contents of input_file already read into memory (optional)
+    
+    Returns:
+        Dict with 'tempo' (BPM, or None), 'live_version' (major Live
+        version, or None), 'minor_version' and 'creator' (attributes of the
+        <Ableton> root), 'midi_tracks' (count) and 'tracks' (a dict with
+        'name', 'clips' and 'notes' per MIDI track), the set's total 'clips'
+        and 'notes', and
+        'automation' as (PointeeId, name or None, event count) tuples
+    
+    Raises:
+        UnsupportedInputError or LiveSetParseError (both ConversionError)
+    """
+    from als2mid_notes import safe_float, safe_int
+    
+    try:
+        zip_member = find_zip_member(input_file, data)
+        with open_live_set(input_file, zip_member, _discard_log, data) as source:
+            live_set = read_live_set(source)
+    except ConversionError:
+        raise
+    except Exception as e:
+        raise LiveSetParseError(f"Error parsing XML: {e}") from e
+    
+    tempo = None
+    for manual_value in live_set['tempos']:
+        tempo = safe_float(manual_value, tempo)
+    minor_version = live_set['ableton'].get('MinorVersion')
+    
+    tracks = []
+    automation = {}     # PointeeId -> event count
+    for miditrack in live_set['midi_tracks']:
+        notes = 0
+        for clip in miditrack['clips']:
+            notes += sum(len(events or ()) for _, events in clip['keytracks'] or ())
+            for pointee_id, automation_events in clip['envelopes']:
+                target = safe_int(pointee_id, -1)
+                if target != -1:
+                    automation[target] = automation.get(target, 0) + len(automation_events)
+        tracks.append({'name': miditrack['name'], 'clips': len(miditrack['clips']), 'notes': notes})
+    
+    return {
+        'tempo': tempo,
+        'live_version': safe_int(minor_version.split('.')[0], None) if minor_version else None,
+        'minor_version': minor_version,
+        'creator': live_set['ableton'].get('Creator'),
+        'midi_tracks': len(tracks),
+        'tracks': tracks,
+        'clips': sum(track['clips'] for track in tracks),
+        'notes': sum(track['notes'] for track in tracks),
+        'automation': [(target, AUTOMATION_MAP[target][1] if target in AUTOMATION_MAP else None, events)
+                       for target, events in sorted(automation.items())],
+    }
+
+
+def index_batch_file(input_file):
+    """
+    Read one set for --index
+    
+    Runs in a worker process when indexing uses more than one job.
+    
+    Returns:
+        (record, None) with the index_live_set() record, or (None, error)
+    """
+    try:
+        return index_live_set(input_file), None
+    except Exception as e:
+        return None, str(e).strip()
+
+
+def print_probe(input_file):
+    """
+    Print one line of --probe output for a Live Set
+    
+    Returns:
+        True if the set could be probed
+    """
+    name = os.path.basename(input_file)
+    try:
+        inventory = probe_live_set(input_file)
+    except (ConversionError, OSError) as e:
+        print(f"  ✗ {name}: {str(e).strip()}")
+        return False
+    if not inventory['live_set']:
+        print(f"  ✗ {name}: Not an Ableton Live Set")
+        return False
+    
+    tempo = f"{inventory['tempo']} BPM" if inventory['tempo'] is not None else "tempo unknown"
+    if inventory['has_notes']:
+        print(f"  ✓ {name}: {inventory['midi_tracks']} MIDI track(s), {inventory['midi_clips']} clip(s), "
+              f"{inventory['note_events']} note(s), {tempo}")
+    else:
+        print(f"  ⚠ {name}: No MIDI notes ({inventory['midi_tracks']} MIDI track(s), {tempo})")
+    return True
+
+
+def load_converter_modules():
+    """Import the modules conversions need (XML parsers, ZIP and gzip readers, note and MIDI writing)"""
+    import xml.etree.ElementTree
+    import zipfile
+    import gzip
+    import als2mid_notes
+    import als2mid_probe
+    import als2mid_tables
+    xml_backend()   # Imports lxml when it is installed
+
+
+def print_startup_profile(main_started, args_parsed):
+    """
+    Report where startup time went, for --startup-profile
+    
+    Loads the converter modules to time them, so it is accurate for the
+    conversion paths and a worst case for the others. Times count from when
+    als2mid began loading; interpreter and site startup before that are not
+    included.
+    """
+    loading_started = perf_counter()
+    load_converter_modules()
+    loaded = perf_counter()
+    print("Startup profile:")
+    print(f"  Module load:       {(main_started - _STARTED) * 1000:7.1f} ms (als2mid and the modules it imports)")
+    print(f"  Argument parsing:  {(args_parsed - main_started) * 1000:7.1f} ms")
+    print(f"  Converter modules: {(loaded - loading_started) * 1000:7.1f} ms (loaded on first conversion)")
+    print(f"  Total:             {(loaded - _STARTED) * 1000:7.1f} ms since als2mid began loading, "
+          f"{len(sys.modules)} modules loaded")
+
+
+def default_job_count():
+    """Number of CPUs this process may run on (falls back to the machine's CPU count)"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def convert_bytes(source, filename='live_set.als', log=_discard_log, verbosity=QUIET, open_stream=None):
+    """
+    Convert a Live Set held in memory, without touching the filesystem
+    
+    Safe to run in several threads or processes at once: nothing is printed
+    unless log says so, and errors are raised rather than exiting.
+    
+    Args:
+        source: Contents of a .als file, or of a .zip archive holding one, as
+            bytes or as a binary file-like object (read to the end)
+        filename: Name the data came from; its extension (.als or .zip)
+            decides how it is read, and the MIDI files are named after it
+        log: Callable that receives progress messages (discarded by default)
+        verbosity: QUIET (default), SUMMARY, VERBOSE or DEBUG
+        open_stream: Optional callable(name) returning a writable binary
+            stream for each MIDI file; the streams are written but not closed
+    
+    Returns:
+        ConversionResult with the MIDI file names in output_files; without
+        open_stream, midi_data holds their contents in the same order
+    
+    Raises:
+        ConversionError (or a subclass) if the data can't be converted
+    """
+    data = source.read() if hasattr(source, 'read') else source
+    output_file = os.path.splitext(os.path.basename(filename))[0] + '.mid'
+    outputs = []
+    
+    def keep_output(name, midi_data):
+        if open_stream is not None:
+            open_stream(name).write(midi_data)
+        else:
+            outputs.append(midi_data)
+    
+    result = convert_ableton_to_midi(filename, output_file, log=log, verbosity=verbosity, data=bytes(data),
+                                     write_output=keep_output, in_memory=True)
+    result.midi_data = outputs
+    return result
+
+
+def convert_with_cache(input_file, output_file, cache, log=print, verbosity=VERBOSE, data=None,
+                       write_output=write_midi_file, probe=False):
+    """
+    convert_ableton_to_midi() backed by a ConversionCache
+    
+    A set whose contents, converter version and options match a cached
+    conversion is not parsed at all: the cached .mid file(s), including any
+    _N-M split files, are written next to output_file. Otherwise the set is
+    converted and the result added to the cache.
+    
+    Args:
+        input_file: Path to the .als or .zip file
+        output_file: Path to the output .mid file
+        cache: ConversionCache to read from and add to
+        log: Callable receiving each message line
+        verbosity: QUIET, SUMMARY, VERBOSE or DEBUG
+        data: Contents of input_file already read into memory (optional)
+        write_output: Callable(path, midi_bytes) that stores each MIDI file
+        probe: Passed on to convert_ableton_to_midi()
+    
+    Returns:
+        ConversionResult (from_cache is True when it came from the cache)
+    """
+    started = perf_counter()
+    key = cache.key_for(input_file, __version__, CACHE_OPTIONS, data=data)
+    entry = cache.restore(key, output_file)
+    if entry is not None:
+        result = ConversionResult(input_file)
+        for field in CACHED_RESULT_FIELDS:
+            setattr(result, field, entry[field])
+        for path, midi_data in entry['outputs']:
+            write_output(path, midi_data)
+            result.output_files.append(path)
+        result.from_cache = True
+        result.timings['total'] = perf_counter() - started
+        if verbosity >= SUMMARY:
+            log(f'Unchanged since last conversion, restored from cache: {input_file}')
+            for path in result.output_files:
+                log(f'  ✓ {path}')
+        return result
+    
+    # Keep the MIDI data on its way out so it can be cached without reading it back
+    outputs = []
+    failed_writes = []
+    def write_and_keep(path, midi_data):
+        try:
+            write_output(path, midi_data)
+        except Exception:
+            failed_writes.append(path)
+            raise
+        outputs.append((path, midi_data))
+    
+    result = convert_ableton_to_midi(input_file, output_file, log=log, verbosity=verbosity, data=data,
+                                     write_output=write_and_keep, probe=probe)
+    # A file that couldn't be written (locked by another program, say) would be missing from the entry
+    if failed_writes:
+        if verbosity >= DEBUG:
+            log(f'Not caching {input_file}: {len(failed_writes)} MIDI file(s) could not be written')
+    elif result.status in ('success', 'no_midi'):
+        metadata = {field: getattr(result, field) for field in CACHED_RESULT_FIELDS}
+        if not cache.store(key, output_file, outputs, metadata) and verbosity >= DEBUG:
+            log(f'Could not add {input_file} to the conversion cache')
+    return result
+
+
+def convert_batch_file(input_file, data, keep_log=True, verbosity=VERBOSE, cache_dir=None,
+                       cache_size_mb=DEFAULT_CACHE_SIZE_MB):
+    """
+    Convert one file for batch mode
+    
+    This is the middle stage of BatchPipeline and runs in a worker process
+    when batch mode uses more than one job, so it only takes and returns
+    picklable values. Nothing is written here: the MIDI files are handed
+    back for the pipeline's writer stage. Sets are probed first, so
+    audio-only sets are never parsed.
+    
+    Args:
+        input_file: Path to the .als file (output goes next to it as .mid)
+        data: Contents of input_file, read by the pipeline's reader stage
+        keep_log: Collect the full conversion log (for .export.log files)
+        verbosity: Verbosity level of the collected messages
+        cache_dir: Conversion cache folder, or None to always convert
+        cache_size_mb: Size limit of the conversion cache
+    
+    Returns:
+        Tuple (ConversionResult, log_text, outputs) where outputs is a list
+        of (path, MIDI bytes) still to be written; a conversion that raised
+        comes back as a result with status 'failed' and the reason in .error
+    """
+    output_file = os.path.splitext(input_file)[0] + ".mid"
+    messages = []
+    outputs = []
+    if not keep_log:
+        # Only the error messages are needed to report a failure
+        verbosity = QUIET
+    
+    def keep_output(path, midi_data):
+        outputs.append((path, midi_data))
     
-    return output_files
+    try:
+        if cache_dir:
+            cache = ConversionCache(cache_dir, cache_size_mb)
+            result = convert_with_cache(input_file, output_file, cache, log=messages.append, verbosity=verbosity,
+                                        data=data, write_output=keep_output, probe=True)
+        else:
+            result = convert_ableton_to_midi(input_file, output_file, log=messages.append, verbosity=verbosity,
+                                             data=data, write_output=keep_output, probe=True)
+    except Exception as e:
+        # ConversionError messages are the converter's own error lines
+        result = ConversionResult(input_file, error=str(e).strip())
+        outputs = []
+    log_text = ''.join(f'{message}\n' for message in messages)
+    return result, log_text, outputs
+
+
+class BatchPipeline:
+    """
+    Batch conversion as three overlapping stages joined by bounded queues
+    
+    A reader thread reads each set into memory ahead of the workers, a pool
+    of worker processes (a single thread with one job) parses and converts,
+    and a writer thread writes the MIDI files. Reading from slow storage,
+    converting and writing all happen at the same time, so a batch runs at
+    the pace of its slowest stage.
+    
+    Results come back from results() in the order the files were submitted.
+    """
+    
+    def __init__(self, convert_one, jobs=1, prefetch=None):
+        """
+        Args:
+            convert_one: Picklable callable(input_file, data) returning the
+                (result, log_text, outputs) tuple of convert_batch_file()
+            jobs: Number of worker processes
+            prefetch: Number of sets read ahead of the workers (default: jobs)
+        """
+        import queue
+        import threading
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        
+        self.convert_one = convert_one
+        if jobs > 1:
+            self.executor = ProcessPoolExecutor(max_workers=jobs)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.paths = queue.Queue()
+        self.converting = queue.Queue(maxsize=jobs + (prefetch or jobs))
+        self.finished = queue.Queue()
+        self.reader = threading.Thread(target=self._read, name='als2mid-reader', daemon=True)
+        self.writer = threading.Thread(target=self._write, name='als2mid-writer', daemon=True)
+        self.reader.start()
+        self.writer.start()
+    
+    def submit(self, input_file):
+        """Queue a file for conversion (returns immediately)"""
+        self.paths.put(input_file)
+    
+    def close(self):
+        """Signal that no more files will be submitted"""
+        self.paths.put(None)
+    
+    def results(self):
+        """Yield (input_file, result, log_text) for every submitted file, in order"""
+        for item in iter(self.finished.get, None):
+            yield item
+    
+    def shutdown(self):
+        """Stop the worker pool, dropping conversions that haven't started"""
+        self.executor.shutdown(cancel_futures=True)
+    
+    def _read(self):
+        # Stage 1: read each set into memory and hand it to the pool; the
+        # bounded queue stops reading when the workers fall behind
+        for input_file in iter(self.paths.get, None):
+            try:
+                with open(input_file, 'rb') as f:
+                    data = f.read()
+                future = self.executor.submit(self.convert_one, input_file, data)
+            except Exception as e:
+                from concurrent.futures import Future
+                future = Future()
+                future.set_result((ConversionResult(input_file, error=f'Error reading file: {e}'), '', []))
+            self.converting.put((input_file, future))
+        self.converting.put(None)
+    
+    def _write(self):
+        # Stage 3: write finished conversions in submission order
+        for input_file, future in iter(self.converting.get, None):
+            try:
+                result, log_text, outputs = future.result()
+            except Exception as e:
+                result, log_text, outputs = ConversionResult(input_file, error=str(e)), '', []
+            for path, midi_data in outputs:
+                try:
+                    write_midi_file(path, midi_data)
+                except OSError as e:
+                    result.status = 'failed'
+                    result.error = f'Error writing MIDI file {path}: {e}'
+                    break
+            self.finished.put((input_file, result, log_text))
+        self.finished.put(None)
+
+
+def convert_request(request, cache=None):
+    """
+    Handle one conversion request for --serve
+    
+    Args:
+        request: Dict with 'input', optional 'output' (defaults to the input
+            with a .mid extension) and 'verbosity' (a VERBOSITY_LEVELS name)
+        cache: ConversionCache to use, or None to always convert
+    
+    Returns:
+        JSON-ready dict with status, error, output_files, warnings and the
+        conversion's log lines
+    """
+    messages = []
+    verbosity = VERBOSITY_LEVELS.get(request.get('verbosity'), VERBOSE)
+    input_file = request['input']
+    output_file = request.get('output') or os.path.splitext(input_file)[0] + '.mid'
+    try:
+        if cache is not None:
+            result = convert_with_cache(input_file, output_file, cache, log=messages.append, verbosity=verbosity)
+        else:
+            result = convert_ableton_to_midi(input_file, output_file, log=messages.append, verbosity=verbosity)
+    except Exception as e:
+        result = ConversionResult(input_file, error=str(e).strip())
+    return {
+        'status': result.status,
+        'error': result.error,
+        'output_files': result.output_files,
+        'warnings': result.warnings,
+        'log': messages,
+    }
+
+
+MANIFEST_NAME = "ALS2MID.manifest.json"   # Written next to ALS2MID.export.log by --incremental
+
+
+def load_batch_manifest(manifest_path):
+    """
+    Read the --incremental manifest of an earlier batch run
+    
+    Returns:
+        Dict of entries keyed on the input path relative to the batch folder;
+        empty if there is no manifest or it was written by another version
+    """
+    import json
+    
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('version') != __version__:
+        return {}
+    return manifest.get('files', {})
+
+
+def write_batch_manifest(manifest_path, entries):
+    """Replace the --incremental manifest in one step, so an interrupted run leaves the old one intact"""
+    import json
+    
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': __version__, 'files': entries}, f)
+    os.replace(temp_path, manifest_path)
+
+
+def manifest_entry(stat, result, folder):
+    """Manifest record of one converted file: its size and mtime before conversion, status and outputs"""
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'status': result.status,
+        'outputs': [os.path.relpath(path, folder) for path in result.output_files],
+    }
+
+
+def is_unchanged(entry, stat, folder):
+    """True if a file still has the size and mtime recorded for a finished conversion whose outputs still exist"""
+    return (entry is not None
+            and entry.get('status') in ('success', 'no_midi')
+            and entry.get('size') == stat.st_size
+            and entry.get('mtime_ns') == stat.st_mtime_ns
+            and all(os.path.exists(os.path.join(folder, path)) for path in entry.get('outputs', [])))
+
+
+def describe_indexed_set(entry):
+    """One-line summary of a library entry, for --query"""
+    tempo = f"{entry['tempo']:g} BPM" if entry['tempo'] is not None else "tempo unknown"
+    version = f"Live {entry['minor_version']}" if entry['minor_version'] else "Live version unknown"
+    return (f"{tempo}, {version}, {entry['midi_tracks']} MIDI track(s), {entry['clips']} clip(s), "
+            f"{entry['notes']} note(s)")
+
+
+def index_folder(library, args, verbosity):
+    """
+    Bring the library index up to date with the sets in a folder, for --index
+    
+    Sets whose size and modification time match their index entry (made by
+    this version) are not opened. New and changed sets are read, with
+    args.jobs worker processes, and indexed sets that no longer exist are
+    dropped.
+    
+    Returns:
+        True if any Live Sets were found
+    """
+    folder = os.path.abspath(args.input)
+    known = library.file_states(folder)
+    seen = set()
+    changed = []
+    unchanged_count = 0
+    for input_file in find_live_sets(folder, recursive=args.recursive, ignore_backups=args.ignore_backups,
+                                     include=args.include, exclude=args.exclude):
+        seen.add(input_file)
+        try:
+            stat = os.stat(input_file)
+        except OSError as e:
+            print(f"  ✗ {os.path.basename(input_file)}: {e}")
+            continue
+        if known.get(input_file) == (stat.st_size, stat.st_mtime_ns, __version__):
+            unchanged_count += 1
+        else:
+            changed.append((input_file, stat))
+    
+    if not seen:
+        print(f"Error: No .als files found in: {args.input}")
+        return False
+    
+    if verbosity >= SUMMARY:
+        print(f"Indexing {len(changed)} new or changed set(s) in: {args.input}")
+    
+    failed_count = 0
+    paths = [input_file for input_file, _ in changed]
+    if args.jobs > 1 and len(changed) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=min(args.jobs, len(changed)))
+        indexed = executor.map(index_batch_file, paths, chunksize=4)
+    else:
+        executor = None
+        indexed = map(index_batch_file, paths)
+    try:
+        for (input_file, stat), (record, error) in zip(changed, indexed):
+            library.store(input_file, stat, __version__, record, error)
+            if record is None:
+                failed_count += 1
+                print(f"  ✗ {os.path.basename(input_file)}: {error}")
+            elif verbosity >= VERBOSE:
+                print(f"  ✓ {os.path.basename(input_file)}: {describe_indexed_set(record)}")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    
+    # Entries of sets that were deleted or moved; sets the walk skipped (patterns, --recursive) stay
+    removed = [path for path in known if path not in seen and not os.path.exists(path)]
+    library.remove(removed)
+    
+    if verbosity >= SUMMARY:
+        print(f"Indexed {len(changed) - failed_count} set(s), {unchanged_count} unchanged, "
+              f"{failed_count} could not be read, {len(removed)} removed")
+        print(f"Library: {library.path}")
+    return True
 
 
 def main():
+    main_started = perf_counter()
+    import argparse
+    
     # Detect if running as compiled executable or Python script
     if getattr(sys, 'frozen', False):
         # Running as compiled executable
@@ -456,46 +1140,235 @@ Examples:
     {prog_name} /path/to/folder --batch
     {prog_name} /path/to/folder --batch --recursive
     {prog_name} /path/to/folder --batch --logs
+    {prog_name} /path/to/folder --batch --jobs 4
+    {prog_name} /path/to/folder --batch --cache
+    {prog_name} /path/to/folder --batch --recursive --incremental
+  
+  Library index (query sets without parsing them again):
+    {prog_name} /path/to/folder --index --recursive
+    {prog_name} --query "tempo=128" --query "midi_tracks>16"
+    {prog_name} /path/to/folder --batch --query "track~bass"
+  
+  Conversion server (keeps the converter loaded between exports):
+    {prog_name} --serve
+    {prog_name} myproject.als --use-server
         """
     )
     
-    parser.add_argument('input', help='Input file (.als or .zip) or folder path (with --batch)')
+    parser.add_argument('input', nargs='?', help='Input file (.als or .zip) or folder path (with --batch)')
     parser.add_argument('-o', '--output', help='Output MIDI file (single file mode only)')
     parser.add_argument('--batch', action='store_true', help='Batch mode: convert all .als files in folder')
     parser.add_argument('--recursive', action='store_true', help='Search subdirectories (batch mode only)')
     parser.add_argument('--logs', action='store_true', help='Create .export.log for each file (batch mode only)')
     parser.add_argument('--ignore-backups', action='store_true', help='Exclude "Backup" folders (batch mode only)')
+    parser.add_argument('--include', action='append', metavar='PATTERN',
+                        help='Only convert files matching this glob pattern, may be repeated (batch mode only, default: *.als)')
+    parser.add_argument('--exclude', action='append', metavar='PATTERN',
+                        help='Skip files and folders matching this glob pattern, may be repeated (batch mode only)')
+    parser.add_argument('--jobs', type=int, default=default_job_count(),
+                        help='Number of files to convert in parallel (batch mode only, default: CPU count)')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'Skip files unchanged since the last run, tracked in {MANIFEST_NAME} (batch mode only)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Reuse earlier conversions of unchanged sets (batch mode only)')
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='Conversion cache folder (implies --cache, default: per-user cache folder)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE_MB, metavar='MB',
+                        help=f'Conversion cache size limit in MB (default: {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--probe', action='store_true',
+                        help='Quickly report MIDI tracks, clips, notes and tempo without converting')
+    parser.add_argument('--index', action='store_true',
+                        help='Record tempo, Live version, MIDI tracks, clip and note counts and automation of the sets '
+                             'in a folder in the library database; only changed sets are read again')
+    parser.add_argument('--query', action='append', metavar='FILTER',
+                        help='List the indexed sets matching a filter such as "tempo=128" or "track~bass", may be '
+                             'repeated; with --batch, convert them')
+    parser.add_argument('--library', metavar='PATH',
+                        help='Library database of --index and --query (default: per-user data folder)')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run a conversion server on 127.0.0.1 for --use-server clients (also honours the cache options)')
+    parser.add_argument('--use-server', action='store_true',
+                        help='Let a running --serve process do the conversion, or convert here if none is running (single file mode only)')
+    parser.add_argument('--port', type=int, default=SERVER_PORT,
+                        help=f'Port of the conversion server (default: {SERVER_PORT})')
+    parser.add_argument('--verbosity', choices=list(VERBOSITY_LEVELS), default='verbose',
+                        help='Amount of detail to print (default: verbose)')
+    parser.add_argument('-q', '--quiet', dest='verbosity', action='store_const', const='quiet',
+                        help='Only print errors and warnings (same as --verbosity quiet)')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='Print how long startup and module imports took before converting')
     parser.add_argument('--version', action='version', version=f'%(prog)s v{__version__}')
     
     args = parser.parse_args()
+    if args.startup_profile:
+        print_startup_profile(main_started, perf_counter())
+    
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.cache_size < 1:
+        parser.error("--cache-size must be at least 1")
+    verbosity = VERBOSITY_LEVELS[args.verbosity]
+    
+    # Server mode
+    if args.serve:
+        from itertools import count
+        from als2mid_server import ConversionServer
+        
+        convert = convert_request
+        if args.cache or args.cache_dir:
+            cache = ConversionCache(args.cache_dir, args.cache_size)
+            cache.prune()
+            conversions = count(1)
+            
+            def convert(request):
+                # Keep a long-running server's cache within --cache-size
+                response = convert_request(request, cache=cache)
+                if next(conversions) % SERVER_PRUNE_INTERVAL == 0:
+                    cache.prune()
+                return response
+        try:
+            server = ConversionServer(convert, port=args.port, version=__version__,
+                                      log=print if verbosity >= SUMMARY else _discard_log)
+        except OSError as e:
+            print(f"Error: Cannot listen on port {args.port}: {e}")
+            sys.exit(1)
+        if verbosity >= SUMMARY:
+            print(f"ALS2MID v{__version__} conversion server listening on 127.0.0.1:{args.port} (Ctrl+C to stop)")
+        with server:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return
+    
+    if args.index or args.query:
+        from als2mid_library import LiveSetLibrary, parse_filter
+    for text in args.query or ():
+        try:
+            parse_filter(text)
+        except ValueError as e:
+            parser.error(f"--query: {e}")
     
-    if not os.path.exists(args.input):
+    if args.input is None:
+        if not args.query or args.batch or args.index:
+            parser.error("the following arguments are required: input")
+    elif not os.path.exists(args.input):
         print(f"Error: Input path '{args.input}' not found")
         sys.exit(1)
     
+    # Library index
+    if args.index:
+        if not os.path.isdir(args.input):
+            print(f"Error: Indexing requires a folder path, got: {args.input}")
+            sys.exit(1)
+        with LiveSetLibrary(args.library) as library:
+            if not index_folder(library, args, verbosity):
+                sys.exit(1)
+        if not args.query:
+            return
+    
+    if args.query and not args.batch:
+        if args.input is not None and not os.path.isdir(args.input):
+            print(f"Error: Queries need a folder path, got: {args.input}")
+            sys.exit(1)
+        with LiveSetLibrary(args.library) as library:
+            matches = library.query(args.query, folder=args.input)
+        for match in matches:
+            if verbosity >= SUMMARY:
+                print(f"  {match['path']}: {describe_indexed_set(match)}")
+            else:
+                print(match['path'])
+        if verbosity >= SUMMARY:
+            print(f"\n{len(matches)} matching set(s)")
+        return
+    
     # Batch mode
+    if args.probe:
+        if not args.batch:
+            sys.exit(0 if print_probe(args.input) else 1)
+        if not os.path.isdir(args.input):
+            print(f"Error: Batch mode requires a folder path, got: {args.input}")
+            sys.exit(1)
+        
+        probed = failed = 0
+        for input_file in find_live_sets(args.input, recursive=args.recursive, ignore_backups=args.ignore_backups,
+                                         include=args.include, exclude=args.exclude):
+            probed += 1
+            if not print_probe(input_file):
+                failed += 1
+        if not probed:
+            print(f"Error: No .als files found in: {args.input}")
+            sys.exit(1)
+        print(f"\nProbed {probed} file(s), {failed} could not be read")
+        return
+    
     if args.batch:
         if not os.path.isdir(args.input):
             print(f"Error: Batch mode requires a folder path, got: {args.input}")
             sys.exit(1)
         
-        # Find all .als files
-        from pathlib import Path
-        search_pattern = "**/*.als" if args.recursive else "*.als"
-        als_files = list(Path(args.input).glob(search_pattern))
+        cache = None
+        if args.cache or args.cache_dir:
+            cache = ConversionCache(args.cache_dir, args.cache_size)
+        convert_one = partial(convert_batch_file, keep_log=args.logs, verbosity=verbosity,
+                              cache_dir=cache.cache_dir if cache else None, cache_size_mb=args.cache_size)
         
-        # Filter out Backup folders if requested
-        if args.ignore_backups:
-            als_files = [f for f in als_files if "Backup" not in f.parts]
+        # Incremental mode: files with the size and mtime of their last
+        # finished conversion, and whose outputs still exist, are not opened
+        manifest_path = os.path.join(args.input, MANIFEST_NAME)
+        previous_entries = load_batch_manifest(manifest_path) if args.incremental else {}
+        manifest_entries = {}
+        stats = {}
+        unchanged = set()
+        unreadable = {}     # Files that vanished since they were found, as failed results
         
-        if not als_files:
-            print(f"Error: No .als files found in: {args.input}")
+        # Find all .als files, handing each to the pipeline as soon as the
+        # walk reaches it so conversion overlaps with the rest of the walk
+        pipeline = BatchPipeline(convert_one, jobs=args.jobs)
+        batch_inputs = []
+        if args.query:
+            # The library already knows which sets match: no folder walk, no parsing to find them
+            with LiveSetLibrary(args.library) as library:
+                batch_sources = [match['path'] for match in library.query(args.query, folder=args.input)]
+        else:
+            batch_sources = find_live_sets(args.input, recursive=args.recursive, ignore_backups=args.ignore_backups,
+                                           include=args.include, exclude=args.exclude)
+        try:
+            for input_file in batch_sources:
+                batch_inputs.append(input_file)
+                if args.incremental:
+                    relative_path = os.path.relpath(input_file, args.input)
+                    try:
+                        stats[input_file] = os.stat(input_file)
+                    except OSError as e:
+                        # Deleted after the walk, or a stale --query path: one failed file, not a failed batch
+                        unreadable[input_file] = ConversionResult(input_file, error=f'Error reading file: {e}')
+                        continue
+                    entry = previous_entries.get(relative_path)
+                    if is_unchanged(entry, stats[input_file], args.input):
+                        unchanged.add(input_file)
+                        manifest_entries[relative_path] = entry
+                        continue
+                pipeline.submit(input_file)
+            pipeline.close()
+        except BaseException:
+            pipeline.shutdown()
+            raise
+        
+        if not batch_inputs:
+            pipeline.shutdown()
+            if args.query:
+                print(f"Error: No indexed sets in {args.input} match the query")
+            else:
+                print(f"Error: No .als files found in: {args.input}")
             sys.exit(1)
         
         # Track results
         success_count = 0
         failed_count = 0
         no_midi_count = 0
+        cached_count = 0
+        unchanged_count = 0
         failed_files = []
         no_midi_files = []
         
@@ -505,86 +1378,116 @@ Examples:
             master_log.write("=" * 60 + "\n")
             master_log.write("ALS2MID Multi-file Conversion Log\n")
             master_log.write(f"Folder: {args.input}\n")
-            master_log.write(f"Found {len(als_files)} .als file(s)\n")
+            master_log.write(f"Found {len(batch_inputs)} .als file(s)\n")
             master_log.write("=" * 60 + "\n\n")
             
-            print("=" * 60)
-            print(f"Batch conversion mode")
-            print(f"Folder: {args.input}")
-            print(f"Found {len(als_files)} .als file(s)")
-            print("=" * 60)
+            if verbosity >= SUMMARY:
+                print("=" * 60)
+                print(f"Batch conversion mode")
+                print(f"Folder: {args.input}")
+                print(f"Found {len(batch_inputs)} .als file(s)")
+                print("=" * 60)
             
-            for idx, input_file in enumerate(als_files, 1):
-                input_file = str(input_file)
-                output_file = os.path.splitext(input_file)[0] + ".mid"
-                
-                print(f"\n[{idx}/{len(als_files)}] Processing: {os.path.basename(input_file)}")
-                
-                # Capture output for logging
-                output_lines = []
-                log_file_path = None
-                log_file = None
-                
-                if args.logs:
-                    log_file_path = os.path.splitext(input_file)[0] + ".export.log"
-                    log_file = open(log_file_path, 'w', encoding='utf-8')
-                
-                old_stdout = sys.stdout
-                try:
-                    # Redirect output
-                    import io
-                    sys.stdout = io.StringIO()
+            converted = pipeline.results()
+            try:
+                for idx, input_file in enumerate(batch_inputs, 1):
+                    output_file = os.path.splitext(input_file)[0] + ".mid"
                     
-                    convert_ableton_to_midi(input_file, output_file)
+                    if verbosity >= SUMMARY:
+                        print(f"\n[{idx}/{len(batch_inputs)}] Processing: {os.path.basename(input_file)}")
                     
-                    # Get captured output
-                    captured = sys.stdout.getvalue()
-                    sys.stdout = old_stdout
-                    output_lines = captured.split('\n')
+                    if input_file in unchanged:
+                        unchanged_count += 1
+                        entry = manifest_entries[os.path.relpath(input_file, args.input)]
+                        if entry['status'] == 'no_midi':
+                            no_midi_count += 1
+                            no_midi_files.append(os.path.basename(input_file))
+                        else:
+                            success_count += 1
+                        if verbosity >= SUMMARY:
+                            print(f"  ✓ Unchanged since last run, skipped")
+                        continue
                     
-                    # Check if no MIDI
-                    if is_no_midi_output(captured):
+                    # Results are reported in discovery order
+                    if input_file in unreadable:
+                        result, log_text = unreadable.pop(input_file), ''
+                    else:
+                        _, result, log_text = next(converted)
+                    if args.incremental and result.status != 'failed':
+                        manifest_entries[os.path.relpath(input_file, args.input)] = manifest_entry(
+                            stats[input_file], result, args.input)
+                    
+                    if result.status == 'no_midi':
                         no_midi_count += 1
                         no_midi_files.append(os.path.basename(input_file))
-                        print(f"  ⚠ No MIDI: {os.path.basename(input_file)}")
-                    else:
+                        if verbosity >= SUMMARY:
+                            print(f"  ⚠ No MIDI: {os.path.basename(input_file)}")
+                    elif result.status == 'success':
                         success_count += 1
-                        print(f"  ✓ Success: {os.path.basename(output_file)}")
+                        if result.from_cache:
+                            cached_count += 1
+                        if verbosity >= SUMMARY:
+                            cached_note = " (cached)" if result.from_cache else ""
+                            print(f"  ✓ Success: {os.path.basename(output_file)}{cached_note}")
+                    else:
+                        failed_count += 1
+                        failed_files.append(os.path.basename(input_file))
+                        if verbosity >= SUMMARY:
+                            print(f"  ✗ Failed: {result.error}")
+                        else:
+                            print(f"✗ Failed: {input_file}: {result.error}")
                     
                     # Write to individual log
-                    if log_file and log_file_path:
-                        log_file.write(captured)
-                        log_file.close()
-                        print(f"  ✓ Log saved: {os.path.basename(log_file_path)}")
-                    
-                except Exception as e:
-                    sys.stdout = old_stdout
-                    failed_count += 1
-                    failed_files.append(os.path.basename(input_file))
-                    print(f"  ✗ Failed: {str(e)}")
-                    if log_file:
-                        log_file.write(f"Error: {str(e)}\n")
-                        log_file.close()
+                    if args.logs:
+                        log_file_path = os.path.splitext(input_file)[0] + ".export.log"
+                        try:
+                            with open(log_file_path, 'w', encoding='utf-8') as log_file:
+                                if result.status == 'failed':
+                                    log_file.write(f"Error: {result.error}\n")
+                                else:
+                                    log_file.write(log_text)
+                        except OSError as e:
+                            # The set's folder may be gone along with the set
+                            print(f"  ⚠ Could not write log: {e}")
+                            continue
+                        if result.status != 'failed' and verbosity >= SUMMARY:
+                            print(f"  ✓ Log saved: {os.path.basename(log_file_path)}")
+            finally:
+                pipeline.shutdown()
+                # Record what finished, even if the run was interrupted
+                if args.incremental:
+                    write_batch_manifest(manifest_path, manifest_entries)
+            
+            # Trim the cache back to its size limit once the batch is done
+            if cache is not None:
+                evicted = cache.prune()
+                if evicted and verbosity >= VERBOSE:
+                    print(f"\nEvicted {evicted} old conversion(s) from the cache")
             
             # Print summary
-            print("\n" + "=" * 60)
-            print("✓ Multi-file conversion completed!")
-            print(f"  Successful: {success_count}")
-            if failed_count > 0:
-                print(f"  Failed:     {failed_count}")
-                for fname in failed_files:
-                    print(f"    - {fname}")
-            else:
-                print(f"  Failed:     0")
-            if no_midi_count > 0:
-                print(f"  No MIDI:    {no_midi_count}")
-                for fname in no_midi_files:
-                    print(f"    - {fname}")
-            else:
-                print(f"  No MIDI:    0")
-            print(f"  Total:      {len(als_files)}")
-            print("=" * 60)
-            print(f"\nMaster log saved: {master_log_path}")
+            if verbosity >= SUMMARY:
+                print("\n" + "=" * 60)
+                print("✓ Multi-file conversion completed!")
+                print(f"  Successful: {success_count}")
+                if failed_count > 0:
+                    print(f"  Failed:     {failed_count}")
+                    for fname in failed_files:
+                        print(f"    - {fname}")
+                else:
+                    print(f"  Failed:     0")
+                if no_midi_count > 0:
+                    print(f"  No MIDI:    {no_midi_count}")
+                    for fname in no_midi_files:
+                        print(f"    - {fname}")
+                else:
+                    print(f"  No MIDI:    0")
+                print(f"  Total:      {len(batch_inputs)}")
+                if cache is not None:
+                    print(f"  From cache: {cached_count}")
+                if args.incremental:
+                    print(f"  Unchanged:  {unchanged_count}")
+                print("=" * 60)
+                print(f"\nMaster log saved: {master_log_path}")
             
             # Write to master log
             master_log.write("\n" + "=" * 60 + "\n")
@@ -603,13 +1506,42 @@ Examples:
                     master_log.write(f"    - {fname}\n")
             else:
                 master_log.write(f"⚠ No MIDI:    0\n")
-            master_log.write(f"Total:        {len(als_files)}\n")
+            master_log.write(f"Total:        {len(batch_inputs)}\n")
+            if args.incremental:
+                master_log.write(f"Unchanged:    {unchanged_count} (skipped)\n")
             master_log.write("=" * 60 + "\n")
     
     # Single file mode
     else:
-        convert_ableton_to_midi(args.input, args.output)
+        if args.use_server:
+            from als2mid_server import send_request
+            
+            # Paths are resolved here, the server runs in another folder
+            output_file = args.output or os.path.splitext(os.path.basename(args.input))[0] + ".mid"
+            response = send_request({'command': 'convert', 'input': os.path.abspath(args.input),
+                                     'output': os.path.abspath(output_file), 'verbosity': args.verbosity},
+                                    port=args.port)
+            # No server, or one that refused the request (e.g. an output not ending in .mid): convert here
+            if response is not None and response.get('status') != 'rejected':
+                for message in response.get('log', []):
+                    print(message)
+                if response.get('status') == 'failed':
+                    error = response.get('error')
+                    if error and error not in (message.strip() for message in response.get('log', [])):
+                        print(error)
+                    sys.exit(1)
+                return
+        
+        try:
+            convert_ableton_to_midi(args.input, args.output, verbosity=verbosity)
+        except ConversionError:
+            # Already reported by the converter
+            sys.exit(1)
 
 
 if __name__ == '__main__':
+    # Needed for batch worker processes in the frozen executable
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
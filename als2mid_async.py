@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Asyncio interface to the ALS2MID converter
+
+For services that accept uploaded Live Sets: conversions take bytes or a
+stream, return the MIDI data in memory and run in an executor so the event
+loop is never blocked. Bad input raises a ConversionError subclass instead
+of exiting the process.
+
+Example:
+    converter = AsyncConverter(max_concurrency=4)
+    result = await converter.convert(upload_bytes, filename="song.als")
+    for name, midi_data in zip(result.output_files, result.midi_data):
+        ...
+    await converter.aclose()
+"""
+
+import asyncio
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from als2mid import QUIET, convert_bytes, default_job_count
+
+
+async def read_source(source):
+    """
+    Get the bytes of a Live Set given as bytes or as a stream
+
+    Streams may be asyncio-style (an async read() method) or ordinary file
+    objects, whose blocking read() is run in a thread.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if inspect.iscoroutinefunction(source.read):
+        return bytes(await source.read())
+    return bytes(await asyncio.to_thread(source.read))
+
+
+def _convert_logged(data, filename, verbosity):
+    """convert_bytes() with its log messages kept in result.log (runs in the executor)"""
+    messages = []
+    result = convert_bytes(data, filename, log=messages.append, verbosity=verbosity)
+    result.log = messages
+    return result
+
+
+class AsyncConverter:
+    """
+    Runs conversions in an executor, at most max_concurrency at a time
+
+    By default the work goes to a process pool of max_concurrency workers,
+    so conversions run in parallel; pass an executor to share an existing one.
+    """
+
+    def __init__(self, max_concurrency=None, executor=None, verbosity=QUIET):
+        """
+        Args:
+            max_concurrency: Conversions allowed to run at once (default: CPU count)
+            executor: concurrent.futures executor to run conversions in
+                (default: a process pool owned by this converter)
+            verbosity: Verbosity of the log collected in each result's log
+        """
+        self.max_concurrency = max_concurrency or default_job_count()
+        self.verbosity = verbosity
+        self._owns_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers=self.max_concurrency)
+        self._semaphore = None  # Created on first use, inside the running event loop
+
+    async def convert(self, source, filename="live_set.als"):
+        """
+        Convert an uploaded Live Set
+
+        Args:
+            source: bytes, or a stream (sync or async) to read them from
+            filename: Name of the upload; .als or .zip decides how it is read
+
+        Returns:
+            ConversionResult whose midi_data holds the MIDI file contents
+            (status 'no_midi' with no data if the set has no MIDI notes) and
+            whose log holds the conversion's messages at the converter's verbosity
+
+        Raises:
+            ConversionError (or a subclass) if the set can't be converted
+        """
+        data = await read_source(source)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, partial(_convert_logged, data, filename, self.verbosity))
+
+    async def aclose(self):
+        """Shut down the executor if this converter created it"""
+        if self._owns_executor:
+            await asyncio.to_thread(self.executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
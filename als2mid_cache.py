@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of ALS2MID conversions
+
+Entries are keyed on a hash of the input file's bytes, the converter version
+and the conversion options, so a set that hasn't changed since it was last
+converted can be served by copying the cached .mid file(s) instead of
+parsing it again. The cache lives in a folder of its own and is trimmed
+back to a size limit, least recently used entries first.
+
+hashlib, json, shutil and tempfile are imported where they are used, so importing
+this module costs nothing until a cache is actually used.
+"""
+
+import os
+import sys
+
+DEFAULT_CACHE_SIZE_MB = 1024
+ENTRY_FILE = "entry.json"
+
+
+def default_cache_dir():
+    """Per-user cache folder (%LOCALAPPDATA%\\ALS2MID\\cache on Windows, ~/.cache/als2mid elsewhere)"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "ALS2MID", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "als2mid")
+
+
+def output_suffixes(output_file, output_paths):
+    """
+    Describe output paths relative to the requested output file
+
+    "song.mid" -> "", "song_16-31.mid" -> "_16-31", so the same split can be
+    recreated next to a different output file.
+    """
+    base, ext = os.path.splitext(output_file)
+    suffixes = []
+    for path in output_paths:
+        if path == output_file:
+            suffixes.append("")
+        elif path.startswith(base) and path.endswith(ext):
+            suffixes.append(path[len(base):len(path) - len(ext)])
+        else:
+            return None
+    return suffixes
+
+
+class ConversionCache:
+    """
+    Cache of converted MIDI files, stored under cache_dir/<key[:2]>/<key>/
+
+    Each entry folder holds the .mid file(s) and an entry.json with the
+    conversion status and summary; the entry.json modification time records
+    when the entry was last used.
+    """
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, input_file, version, options=None, data=None):
+        """
+        Hash the input file's contents together with the converter version and options
+
+        data, if given, is the input file's contents already read into memory.
+        """
+        import hashlib
+        import json
+
+        digest = hashlib.sha256()
+        digest.update(f"{version}\n{json.dumps(options or {}, sort_keys=True)}\n".encode("utf-8"))
+        if data is not None:
+            digest.update(data)
+        else:
+            with open(input_file, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def restore(self, key, output_file):
+        """
+        Look up a cached conversion for output_file
+
+        Returns:
+            The entry's metadata dict with 'outputs' set to a list of
+            (path, MIDI bytes) named after output_file, or None on a cache miss
+        """
+        import json
+
+        entry_dir = self._entry_dir(key)
+        entry_path = os.path.join(entry_dir, ENTRY_FILE)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+
+            base, ext = os.path.splitext(output_file)
+            outputs = []
+            for index, suffix in enumerate(entry["suffixes"]):
+                with open(os.path.join(entry_dir, f"{index}.mid"), "rb") as f:
+                    outputs.append((base + suffix + ext if suffix else output_file, f.read()))
+
+            # Mark as recently used for LRU eviction
+            os.utime(entry_path, None)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        entry["outputs"] = outputs
+        return entry
+
+    def store(self, key, output_file, outputs, metadata):
+        """
+        Add a finished conversion to the cache
+
+        Args:
+            key: Key from key_for()
+            output_file: The output path the conversion was asked for
+            outputs: List of (path, MIDI bytes) it produced (may be empty)
+            metadata: JSON-serialisable summary (status, counts, ...) handed
+                back by restore()
+
+        Returns:
+            True if the entry was stored
+        """
+        import json
+        import shutil
+        import tempfile
+
+        suffixes = output_suffixes(output_file, [path for path, _ in outputs])
+        if suffixes is None:
+            return False
+
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            return True
+
+        # Build the entry in a temporary folder and move it into place in one
+        # step, so concurrent batch workers never see half-written entries
+        parent = os.path.dirname(entry_dir)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+        try:
+            size = 0
+            for index, (_, midi_data) in enumerate(outputs):
+                with open(os.path.join(staging, f"{index}.mid"), "wb") as f:
+                    f.write(midi_data)
+                size += len(midi_data)
+            entry = dict(metadata, suffixes=suffixes, size=size)
+            with open(os.path.join(staging, ENTRY_FILE), "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.rename(staging, entry_dir)
+        except OSError:
+            # Another worker stored the same key first, or the cache is unwritable
+            shutil.rmtree(staging, ignore_errors=True)
+            return os.path.exists(entry_dir)
+        return True
+
+    def prune(self):
+        """
+        Evict least recently used entries until the cache fits max_size_mb
+
+        Returns:
+            Number of entries removed
+        """
+        import json
+        import shutil
+
+        entries = []
+        total = 0
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith(".tmp-"):
+                    continue
+                entry_path = os.path.join(entry.path, ENTRY_FILE)
+                try:
+                    last_used = os.stat(entry_path).st_mtime
+                    with open(entry_path, "r", encoding="utf-8") as f:
+                        size = int(json.load(f).get("size", 0))
+                except (OSError, ValueError):
+                    continue
+                entries.append((last_used, size, entry.path))
+                total += size
+
+        removed = 0
+        entries.sort()
+        for last_used, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
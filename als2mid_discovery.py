@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Live Set discovery for ALS2MID batch conversion
+
+Walks a folder with os.scandir and yields .als files as they are found,
+so conversion can start before the walk finishes. Folders that never hold
+sets worth converting (Ableton's Backup copies, Samples, Ableton Project
+Info) are pruned before they are entered instead of filtered out afterwards.
+"""
+
+import os
+
+DEFAULT_INCLUDE = ("*.als",)
+BACKUP_DIRS = ("Backup",)                               # Pruned with ignore_backups
+PROJECT_DATA_DIRS = ("Samples", "Ableton Project Info")  # Always pruned when recursing
+
+
+def _matches(patterns, name, relative_path):
+    """Match glob patterns against a name, or against the relative path for patterns containing '/'"""
+    from fnmatch import fnmatch     # Imports re, which the GUI and --use-server don't otherwise need
+
+    for pattern in patterns:
+        if fnmatch(relative_path if "/" in pattern else name, pattern):
+            return True
+    return False
+
+
+def find_live_sets(folder, recursive=False, ignore_backups=False, include=None, exclude=None,
+                   prune_dirs=PROJECT_DATA_DIRS):
+    """
+    Yield the paths of Live Sets below a folder
+
+    Files are yielded in the same order as Path.glob("**/*.als"): each
+    folder's own files first, then its sub-folders depth first.
+
+    Args:
+        folder: Folder to search
+        recursive: Also search sub-folders
+        ignore_backups: Skip "Backup" folders
+        include: Glob patterns a file must match (default: *.als)
+        exclude: Glob patterns for files and folders to skip
+        prune_dirs: Folder names never entered
+
+    Patterns without a '/' match file or folder names; patterns with one
+    match the path relative to folder, using '/' as separator.
+    """
+    include = tuple(include or DEFAULT_INCLUDE)
+    exclude = tuple(exclude or ())
+    pruned = set(prune_dirs or ())
+    if ignore_backups:
+        pruned.update(BACKUP_DIRS)
+
+    pending = [(folder, "")]
+    while pending:
+        path, relative_dir = pending.pop()
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            # Unreadable folder (permissions, vanished network share)
+            continue
+
+        subfolders = []
+        for entry in entries:
+            relative_path = relative_dir + entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if recursive and entry.name not in pruned and not _matches(exclude, entry.name, relative_path):
+                    subfolders.append((entry.path, relative_path + "/"))
+            elif _matches(include, entry.name, relative_path) and not _matches(exclude, entry.name, relative_path):
+                yield entry.path
+
+        # Reversed so the first sub-folder is popped (and walked) first
+        pending.extend(reversed(subfolders))
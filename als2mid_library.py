@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+SQLite index of Live Set metadata for ALS2MID
+
+--index records each set's tempo, Live version, MIDI tracks, clip and note
+counts and automation targets in a local SQLite database, keyed on the
+set's absolute path together with its size and modification time. Later
+runs only read the sets that changed, and --query answers questions such as
+"which sets are at 128 BPM with more than 16 MIDI tracks" from the database
+instead of parsing every set again.
+
+sqlite3 is imported when a library is opened, so importing this module
+costs nothing for conversions.
+"""
+
+import os
+import re
+import sys
+
+LIBRARY_NAME = "library.sqlite"
+SCHEMA_VERSION = 2      # PRAGMA user_version of the tables below; older databases are rebuilt
+
+SCHEMA = """
+CREATE TABLE sets (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    indexed_by TEXT NOT NULL,       -- ALS2MID version that read the set
+    status TEXT NOT NULL,           -- 'indexed' or 'failed'
+    error TEXT,
+    tempo REAL,
+    live_version INTEGER,           -- Major Live version from MinorVersion ("12.0_12049" -> 12)
+    minor_version TEXT,
+    creator TEXT,
+    midi_tracks INTEGER,
+    clips INTEGER,
+    notes INTEGER
+);
+CREATE TABLE tracks (
+    set_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    clips INTEGER NOT NULL,
+    notes INTEGER NOT NULL
+);
+CREATE TABLE automation (
+    set_id INTEGER NOT NULL,
+    target INTEGER NOT NULL,        -- Envelope PointeeId
+    name TEXT,                      -- Controller name, or NULL for device-specific targets
+    events INTEGER NOT NULL
+);
+CREATE INDEX sets_tempo ON sets (tempo);
+CREATE INDEX tracks_set ON tracks (set_id);
+CREATE INDEX automation_set ON automation (set_id);
+"""
+
+# --query fields: numeric columns, text columns, and names of a set's tracks and automation targets
+NUMERIC_FIELDS = {
+    'tempo': 'tempo',
+    'live': 'live_version',
+    'midi_tracks': 'midi_tracks',
+    'clips': 'clips',
+    'notes': 'notes',
+}
+TEXT_FIELDS = {
+    'version': 'minor_version',
+    'creator': 'creator',
+    'path': 'path',
+}
+RELATED_FIELDS = ('track', 'automation')
+QUERY_FIELDS = tuple(NUMERIC_FIELDS) + tuple(TEXT_FIELDS) + RELATED_FIELDS
+
+FILTER_PATTERN = re.compile(r'^\s*(\w+)\s*(<=|>=|!=|=|<|>|~)\s*(.*?)\s*$')
+
+
+def default_library_path():
+    """Per-user library database (%LOCALAPPDATA%\\ALS2MID\\library.sqlite on Windows, ~/.local/share/als2mid elsewhere)"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "ALS2MID", LIBRARY_NAME)
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "als2mid", LIBRARY_NAME)
+
+
+def _like_pattern(text):
+    """LIKE pattern matching text anywhere, with LIKE's wildcards escaped"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _under_folder(folder):
+    """SQL condition (and parameters) selecting the sets below a folder"""
+    prefix = os.path.join(os.path.abspath(folder), '')
+    return 'substr(path, 1, ?) = ?', [len(prefix), prefix]
+
+
+def parse_filter(text):
+    """
+    Turn a --query filter such as "tempo=128" or "track~bass" into SQL
+
+    Numeric fields take =, !=, <, <=, > and >=; text fields, track names and
+    automation targets take = and != (ignoring case) and ~ (contains).
+
+    Returns:
+        (condition, parameters) for a WHERE clause over the sets table
+
+    Raises:
+        ValueError describing what is wrong with the filter
+    """
+    match = FILTER_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid filter '{text}', expected FIELD OPERATOR VALUE such as tempo=128")
+    field, operator, value = match.groups()
+
+    if field in NUMERIC_FIELDS:
+        if operator == '~':
+            raise ValueError(f"'~' only works with text fields, not '{field}'")
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"'{field}' needs a number, got '{value}'") from None
+        return f"{NUMERIC_FIELDS[field]} {operator} ?", [number]
+
+    if field in TEXT_FIELDS or field in RELATED_FIELDS:
+        if operator not in ('=', '!=', '~'):
+            raise ValueError(f"'{field}' only takes =, != or ~")
+        if operator == '~':
+            comparison, parameter = "LIKE ? ESCAPE '\\'", _like_pattern(value)
+        else:
+            comparison, parameter = "= ? COLLATE NOCASE", value
+        negate = 'NOT ' if operator == '!=' else ''
+        if field in TEXT_FIELDS:
+            return f"{negate}{TEXT_FIELDS[field]} {comparison}", [parameter]
+        if field == 'track':
+            return (f"{negate}EXISTS (SELECT 1 FROM tracks WHERE tracks.set_id = sets.id "
+                    f"AND name {comparison})", [parameter])
+        # Automation targets match on their name or their PointeeId
+        return (f"{negate}EXISTS (SELECT 1 FROM automation WHERE automation.set_id = sets.id "
+                f"AND (name {comparison} OR CAST(target AS TEXT) {comparison}))", [parameter, parameter])
+
+    raise ValueError(f"Unknown field '{field}' (choose from {', '.join(QUERY_FIELDS)})")
+
+
+class LiveSetLibrary:
+    """
+    Library database of indexed Live Sets
+
+    One row per set in 'sets', with its MIDI tracks in 'tracks' and the
+    automation targets of its clips in 'automation'. Sets that could not be
+    read are kept as 'failed' rows, so they are not read again until they
+    change.
+    """
+
+    def __init__(self, path=None):
+        import sqlite3
+
+        self.path = path or default_library_path()
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self._create_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _create_schema(self):
+        connection = self.connection
+        version = connection.execute('PRAGMA user_version').fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        # The index only caches what is in the sets, so an outdated one is rebuilt rather than migrated
+        with connection:
+            for table in ('sets', 'tracks', 'automation'):
+                connection.execute(f'DROP TABLE IF EXISTS {table}')
+            connection.executescript(SCHEMA)
+            connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def file_states(self, folder=None):
+        """
+        Size, modification time and indexing version of the indexed sets
+
+        Returns:
+            Dict mapping each path (below folder, if given) to (size, mtime_ns, indexed_by)
+        """
+        sql = 'SELECT path, size, mtime_ns, indexed_by FROM sets'
+        parameters = []
+        if folder is not None:
+            condition, parameters = _under_folder(folder)
+            sql += f' WHERE {condition}'
+        return {path: (size, mtime_ns, indexed_by)
+                for path, size, mtime_ns, indexed_by in self.connection.execute(sql, parameters)}
+
+    def store(self, path, stat, version, record=None, error=None):
+        """
+        Replace the index entry of one set
+
+        Args:
+            path: Absolute path of the set
+            stat: os.stat() result of the set, taken before it was read
+            version: ALS2MID version that read it
+            record: Metadata dict from index_live_set(), or None if it failed
+            error: Why the set could not be read
+        """
+        connection = self.connection
+        with connection:
+            self._delete(path)
+            if record is None:
+                connection.execute(
+                    'INSERT INTO sets (path, size, mtime_ns, indexed_by, status, error) VALUES (?, ?, ?, ?, ?, ?)',
+                    (path, stat.st_size, stat.st_mtime_ns, version, 'failed', error))
+                return
+            set_id = connection.execute(
+                'INSERT INTO sets (path, size, mtime_ns, indexed_by, status, tempo, live_version, minor_version, '
+                'creator, midi_tracks, clips, notes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (path, stat.st_size, stat.st_mtime_ns, version, 'indexed', record['tempo'], record['live_version'],
+                 record['minor_version'], record['creator'], record['midi_tracks'], record['clips'],
+                 record['notes'])).lastrowid
+            connection.executemany(
+                'INSERT INTO tracks (set_id, position, name, clips, notes) VALUES (?, ?, ?, ?, ?)',
+                [(set_id, position, track['name'], track['clips'], track['notes'])
+                 for position, track in enumerate(record['tracks'])])
+            connection.executemany(
+                'INSERT INTO automation (set_id, target, name, events) VALUES (?, ?, ?, ?)',
+                [(set_id, target, name, events) for target, name, events in record['automation']])
+
+    def _delete(self, path):
+        connection = self.connection
+        row = connection.execute('SELECT id FROM sets WHERE path = ?', (path,)).fetchone()
+        if row is not None:
+            for table in ('tracks', 'automation'):
+                connection.execute(f'DELETE FROM {table} WHERE set_id = ?', row)
+            connection.execute('DELETE FROM sets WHERE id = ?', row)
+
+    def remove(self, paths):
+        """Drop sets from the index (files that were deleted or moved)"""
+        with self.connection:
+            for path in paths:
+                self._delete(path)
+
+    def query(self, filters=(), folder=None):
+        """
+        Find indexed sets matching every filter
+
+        Args:
+            filters: --query filter strings (see parse_filter())
+            folder: Only return sets below this folder
+
+        Returns:
+            List of dicts with the set's path, tempo, live_version,
+            minor_version, creator, midi_tracks, clips and notes, ordered
+            by path
+
+        Raises:
+            ValueError if a filter is invalid
+        """
+        conditions = ["status = 'indexed'"]
+        parameters = []
+        if folder is not None:
+            condition, folder_parameters = _under_folder(folder)
+            conditions.append(condition)
+            parameters += folder_parameters
+        for text in filters:
+            condition, filter_parameters = parse_filter(text)
+            conditions.append(condition)
+            parameters += filter_parameters
+
+        columns = ('path', 'tempo', 'live_version', 'minor_version', 'creator', 'midi_tracks', 'clips', 'notes')
+        sql = f"SELECT {', '.join(columns)} FROM sets WHERE {' AND '.join(conditions)} ORDER BY path"
+        return [dict(zip(columns, row)) for row in self.connection.execute(sql, parameters)]
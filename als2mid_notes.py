@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Columnar note extraction for ALS2MID
+
+The notes of a clip are gathered into columns (time, duration, key,
+velocity) and offset, clamped, validated and converted to ticks in one
+batch per clip, instead of one round of parsing and checks per
+<MidiNoteEvent>. NumPy is used for large clips when it is installed; the
+pure-Python path gives identical results without it.
+"""
+
+MIN_NOTE_DURATION = 1.0 / 96.0  # 1/96th of a quarter note (0.0104166... beats)
+NUMPY_MIN_NOTES = 64            # Below this NumPy's per-call overhead outweighs its gain
+MAX_NOTE_TICKS = 2 ** 62        # Note ticks and lengths stay below this, so note-on + length fits in int64
+
+numpy = None            # Imported on first use: it costs more to load than small sets take to convert
+_numpy_checked = False
+
+
+def _have_numpy():
+    """Import NumPy if it is installed (once)"""
+    global numpy, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+    return numpy is not None
+
+
+def safe_float(s, default=0.0):
+    """Parse an XML attribute as a float; missing or malformed values give default"""
+    try:
+        if s is None:
+            return default
+        return float(s)
+    except Exception:
+        return default
+
+
+def safe_int(s, default=0):
+    """Parse an XML attribute as an int (truncating, like Live's own numbers); bad values give default"""
+    try:
+        if s is None:
+            return default
+        return int(float(s))
+    except Exception:
+        return default
+
+
+def parse_floats(values, default=0.0):
+    """Parse a column of attribute strings as floats, falling back per value only if one is bad"""
+    try:
+        return list(map(float, values))
+    except (TypeError, ValueError):
+        return [safe_float(value, default) for value in values]
+
+
+def _float_array(values):
+    """parse_floats() straight into a NumPy array"""
+    try:
+        return numpy.fromiter(map(float, values), numpy.float64, len(values))
+    except (TypeError, ValueError):
+        return numpy.array(parse_floats(values), dtype=numpy.float64)
+
+
+def _note_values(key, time, duration, velocity):
+    """The note as the converter reports it: clamped duration and truncated velocity"""
+    if 0 < duration < MIN_NOTE_DURATION:
+        duration = MIN_NOTE_DURATION
+    return key, safe_int(velocity), duration, time
+
+
+def _clip_columns(keytracks):
+    """
+    Flatten a clip's key tracks into key, time, duration and velocity columns
+
+    Keys are parsed once per key track; the note attributes stay raw strings.
+    """
+    keys, times, durations, velocities = [], [], [], []
+    for key_value, notes in keytracks:
+        if not notes:
+            continue
+        keys.extend([safe_int(key_value)] * len(notes))
+        note_times, note_durations, note_velocities = zip(*notes)
+        times.extend(note_times)
+        durations.extend(note_durations)
+        velocities.extend(note_velocities)
+    return keys, times, durations, velocities
+
+
+def _python_note_ticks(keys, times, durations, velocities, offset, ticks_per_quarternote):
+    max_beats = MAX_NOTE_TICKS / ticks_per_quarternote
+    ticks, duration_ticks, pitches, volumes, skipped = [], [], [], [], []
+    for key, time, duration, velocity in zip(keys, times, durations, velocities):
+        time += offset
+        if 0 < duration < MIN_NOTE_DURATION:
+            duration = MIN_NOTE_DURATION
+        # Key must be 0-127 and velocity 1-127 once truncated; times and
+        # durations must become ticks that fit in int64 (no NaN or infinity)
+        if (0 <= key <= 127 and 1 <= velocity < 128 and
+                0 < duration < max_beats and 0 <= time < max_beats):
+            ticks.append(int(time * ticks_per_quarternote))
+            duration_ticks.append(int(duration * ticks_per_quarternote))
+            pitches.append(key)
+            volumes.append(int(velocity))
+        else:
+            skipped.append(_note_values(key, time, duration, velocity))
+    return ticks, duration_ticks, pitches, volumes, skipped
+
+
+def _numpy_note_ticks(keys, times, durations, velocities, offset, ticks_per_quarternote):
+    max_beats = MAX_NOTE_TICKS / ticks_per_quarternote
+    try:
+        key = numpy.array(keys, dtype=numpy.int64)
+    except OverflowError:
+        # Keys such as "1e30" are invalid anyway; -1 keeps them invalid in int64
+        key = numpy.array([k if 0 <= k <= 127 else -1 for k in keys], dtype=numpy.int64)
+    time = _float_array(times) + offset
+    raw_duration = _float_array(durations)
+    raw_velocity = _float_array(velocities)
+    velocity = numpy.trunc(raw_velocity)
+
+    duration = numpy.where((raw_duration > 0) & (raw_duration < MIN_NOTE_DURATION), MIN_NOTE_DURATION, raw_duration)
+    with numpy.errstate(invalid='ignore'):
+        valid = ((key >= 0) & (key <= 127) & (velocity >= 1) & (velocity <= 127) &
+                 (duration > 0) & (duration < max_beats) & (time >= 0) & (time < max_beats))
+
+    skipped = [_note_values(keys[index], time[index].item(), raw_duration[index].item(), raw_velocity[index].item())
+               for index in numpy.flatnonzero(~valid)]
+    if skipped:
+        key, time, duration, velocity = key[valid], time[valid], duration[valid], velocity[valid]
+    return ((time * ticks_per_quarternote).astype(numpy.int64).tolist(),
+            (duration * ticks_per_quarternote).astype(numpy.int64).tolist(),
+            key.tolist(),
+            velocity.astype(numpy.int64).tolist(),
+            skipped)
+
+
+def clip_note_ticks(keytracks, offset, ticks_per_quarternote):
+    """
+    Turn a clip's key tracks into tick columns ready for TrackTables.add_notes()
+
+    Args:
+        keytracks: The clip record's [(MidiKey, [(Time, Duration, Velocity), ...]), ...]
+            with the attribute strings as found in the XML
+        offset: Clip start in beats, added to every note time
+        ticks_per_quarternote: MIDI file resolution
+
+    Returns:
+        (ticks, duration_ticks, pitches, volumes, skipped): lists of ints for the
+        valid notes in clip order, and (key, velocity, duration, time) for each
+        note skipped as out of range
+    """
+    keys, times, durations, velocities = _clip_columns(keytracks)
+    if not keys:
+        return [], [], [], [], []
+
+    offset = float(offset)
+    if len(keys) >= NUMPY_MIN_NOTES and _have_numpy():
+        return _numpy_note_ticks(keys, times, durations, velocities, offset, ticks_per_quarternote)
+    return _python_note_ticks(keys, parse_floats(times), parse_floats(durations),
+                              parse_floats(velocities), offset, ticks_per_quarternote)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Quick triage of Live Sets without parsing the XML
+
+probe_stream() scans the decompressed bytes of a Live Set for the
+<MidiTrack, <MidiClip and <MidiNoteEvent markers and the song tempo. It is
+much cheaper than a full parse, so batch mode uses it to pass over sets
+that can't contain MIDI notes (audio-only sets). The counts are estimates:
+every marker in the file is counted, wherever it sits, and the XML is not
+checked for errors.
+"""
+
+import re
+
+CHUNK_SIZE = 1024 * 1024
+LIVE_SET_MARKER = b'<Ableton'
+TRACK_MARKER = b'<MidiTrack'
+CLIP_MARKER = b'<MidiClip'
+NOTE_MARKER = b'<MidiNoteEvent'
+TEMPO_MARKER = b'<Tempo>'
+OVERLAP = 512       # Bytes carried into the next chunk, enough for a marker or a <Tempo> up to its <Manual>
+
+# <Tempo>, any self-closing elements before it (LomId), then <Manual Value="...">
+TEMPO_MANUAL = re.compile(rb'<Tempo>(?:\s*<(?!Manual\b)[^<>]*/>)*\s*<Manual Value="([^"]*)"')
+
+
+def _count(marker, buffer, tail):
+    # Occurrences entirely within tail were counted with the previous chunk
+    return buffer.count(marker) - tail.count(marker)
+
+
+def _last_tempo(buffer, tempo):
+    """Manual value of the last complete <Tempo> in buffer (tempo if there is none)"""
+    position = buffer.find(TEMPO_MARKER)
+    while position != -1:
+        match = TEMPO_MANUAL.match(buffer, position)
+        if match:
+            tempo = match.group(1)
+        position = buffer.find(TEMPO_MARKER, position + 1)
+    return tempo
+
+
+def probe_stream(stream, stop_at_notes=False):
+    """
+    Scan a decompressed Live Set stream for MIDI content
+
+    Args:
+        stream: Binary file object with the Live Set XML
+        stop_at_notes: Stop reading at the first <MidiNoteEvent> (enough to
+            know the set has notes; the counts are then partial)
+
+    Returns:
+        Dict with 'live_set' (an <Ableton> root was seen), 'midi_tracks',
+        'midi_clips' and 'note_events' (marker counts), 'has_notes',
+        'tempo' (raw value of the last Tempo/Manual, or None) and 'complete'
+        (False if reading stopped early)
+    """
+    inventory = {
+        'live_set': False,
+        'midi_tracks': 0,
+        'midi_clips': 0,
+        'note_events': 0,
+        'has_notes': False,
+        'tempo': None,
+        'complete': True,
+    }
+    tail = b''
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer = tail + chunk
+        if not inventory['live_set']:
+            inventory['live_set'] = LIVE_SET_MARKER in buffer
+        inventory['midi_tracks'] += _count(TRACK_MARKER, buffer, tail)
+        inventory['midi_clips'] += _count(CLIP_MARKER, buffer, tail)
+        notes = _count(NOTE_MARKER, buffer, tail)
+        if notes:
+            inventory['note_events'] += notes
+            inventory['has_notes'] = True
+            if stop_at_notes:
+                inventory['complete'] = False
+                break
+        inventory['tempo'] = _last_tempo(buffer, inventory['tempo'])
+        tail = buffer[-OVERLAP:]
+
+    if inventory['tempo'] is not None:
+        inventory['tempo'] = inventory['tempo'].decode('ascii', 'replace')
+    return inventory
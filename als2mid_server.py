@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Local conversion server for ALS2MID
+
+A long-running `als2mid.py --serve` process keeps the converter (and its
+conversion cache) loaded, so repeated exports - e.g. from the Max for Live
+device - skip interpreter and import startup. `als2mid.py --use-server`
+forwards a conversion to it, and converts in-process if none is running.
+
+Protocol: one JSON object per line over a TCP connection to 127.0.0.1.
+    {"command": "convert", "token": "...", "input": "/abs/song.als", "output": "/abs/song.mid", "verbosity": "summary"}
+    {"command": "ping", "token": "..."}
+    {"command": "shutdown", "token": "..."}
+Each request gets one JSON line back with at least a "status" key;
+"rejected" means the request itself was refused (bad token or paths), so
+the client can still convert in-process.
+
+Any local process can connect to 127.0.0.1, so every request must carry the
+token the server writes to a file only its user can read when it starts.
+Conversions only write .mid files.
+"""
+
+import hmac
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+HOST = "127.0.0.1"          # Never reachable from other machines
+MAX_REQUEST_BYTES = 65536
+READ_TIMEOUT = 120          # Seconds a client waits for a reply before converting in-process
+
+
+def default_token_path(port):
+    """
+    Per-user file holding the token of the server on a port
+
+    %LOCALAPPDATA%\\ALS2MID on Windows; $XDG_RUNTIME_DIR/als2mid or
+    ~/.cache/als2mid elsewhere.
+    """
+    if sys.platform == "win32":
+        base = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "ALS2MID")
+    elif os.environ.get("XDG_RUNTIME_DIR"):
+        base = os.path.join(os.environ["XDG_RUNTIME_DIR"], "als2mid")
+    else:
+        base = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                            "als2mid")
+    return os.path.join(base, f"server-{port}.token")
+
+
+def _write_token(path, token):
+    """Write the token to a file only the current user can read (replacing any earlier one)"""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="ascii") as f:
+        f.write(token)
+
+
+def _read_token(path):
+    try:
+        with open(path, "r", encoding="ascii") as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # A client may send several requests over one connection
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES)
+            if not line:
+                break
+            response = self.server.dispatch(line)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class ConversionServer(socketserver.ThreadingTCPServer):
+    """
+    Threaded localhost server answering conversion requests
+
+    Args:
+        convert: Callable(request dict) returning a JSON-serialisable
+            response dict, run for every "convert" request
+        port: TCP port on 127.0.0.1 (als2mid.SERVER_PORT by default on the command line)
+        version: Reported by "ping"
+        log: Callable that receives one line per request handled
+        token_path: File the request token is written to (default:
+            default_token_path(port)); removed by server_close()
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, convert, port, version=None, log=print, token_path=None):
+        import secrets
+
+        self.convert = convert
+        self.version = version
+        self.log = log
+        super().__init__((HOST, port), _RequestHandler)
+        self.token = secrets.token_hex(32)
+        self.token_path = token_path or default_token_path(port)
+        try:
+            _write_token(self.token_path, self.token)
+        except OSError:
+            super().server_close()
+            raise
+
+    def server_close(self):
+        super().server_close()
+        if _read_token(self.token_path) == self.token:
+            try:
+                os.remove(self.token_path)
+            except OSError:
+                pass
+
+    def dispatch(self, line):
+        """Decode one request line and produce its response"""
+        try:
+            request = json.loads(line)
+            command = request.get("command", "convert")
+            token = request.get("token")
+        except (ValueError, AttributeError) as e:
+            return {"status": "rejected", "error": f"Invalid request: {e}"}
+
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode("utf-8"), self.token.encode("ascii")):
+            return {"status": "rejected", "error": "Invalid request: missing or wrong token"}
+
+        if command == "ping":
+            return {"status": "ok", "version": self.version}
+        if command == "shutdown":
+            # shutdown() waits for serve_forever() to return, so not from this thread
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"status": "ok"}
+        if command != "convert":
+            return {"status": "rejected", "error": f"Unknown command: {command}"}
+        if not isinstance(request.get("input"), str) or not os.path.isabs(request["input"]):
+            return {"status": "rejected", "error": "Invalid request: 'input' must be an absolute path"}
+        output = request.get("output")
+        if output is not None and not (isinstance(output, str) and os.path.isabs(output)
+                                       and output.lower().endswith(".mid")):
+            return {"status": "rejected", "error": "Invalid request: 'output' must be an absolute path to a .mid file"}
+
+        try:
+            response = self.convert(request)
+        except Exception as e:
+            response = {"status": "failed", "error": str(e)}
+        self.log(f"{response.get('status')}: {request['input']}")
+        return response
+
+
+def send_request(request, port, connect_timeout=0.5, read_timeout=READ_TIMEOUT, token_path=None):
+    """
+    Send one request to a running server, adding the server's token
+
+    Returns:
+        The server's response dict, or None if no server is listening (or
+        none started by this user), or it didn't answer with a JSON object
+        within read_timeout seconds
+    """
+    token = _read_token(token_path or default_token_path(port))
+    if not token:
+        return None
+    request = dict(request, token=token)
+    try:
+        with socket.create_connection((HOST, port), timeout=connect_timeout) as connection:
+            # Conversions of large sets can take a while once connected
+            connection.settimeout(read_timeout)
+            connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with connection.makefile("rb") as reply:
+                response = json.loads(reply.readline())
+    except (OSError, ValueError):
+        # Not an ALS2MID server on the port, a hung one, or a dropped connection
+        return None
+    return response if isinstance(response, dict) else None
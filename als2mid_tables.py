@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Columnar track tables for ALS2MID
+
+The converter fills one TrackTables per MIDI track: a NoteTable and two
+EventTables (CC and pitch bend) of typed array columns. write_midi() then
+serializes a Standard MIDI File straight from the tables - sorting, note
+dedup and delta-time encoding run over flat integer arrays rather than one
+event object per message. The bytes are the same as the bundled midiutil
+MIDIFile produced with removeDuplicates=True, deinterleave=False and
+adjust_origin=False.
+"""
+
+import struct
+from array import array
+
+from midiutil_v1_2_1 import TICKSPERQUARTERNOTE, appendVarLength
+
+# Sort keys pack (tick, secondary order, slot) into one int, so a track sorts
+# as plain integers. The secondary order is midiutil's sec_sort_order: at the
+# same tick controllers and pitch bends come before note offs before note ons
+SLOT_BITS = 32
+SLOT_MASK = (1 << SLOT_BITS) - 1
+EVENT_SORT = 1 << SLOT_BITS
+NOTE_OFF_SORT = 2 << SLOT_BITS
+NOTE_ON_SORT = 3 << SLOT_BITS
+TICK_SHIFT = SLOT_BITS + 2
+
+NOTE_ON = 0x90
+NOTE_OFF = 0x80
+CONTROLLER = 0xB0
+PITCH_WHEEL = 0xE0
+END_OF_TRACK = b'\x00\xff\x2f\x00'
+
+
+class NoteTable:
+    """Notes of one track as parallel columns, one row per note"""
+
+    def __init__(self):
+        self.ticks = array('q')         # Note on tick
+        self.durations = array('q')     # Length in ticks
+        self.pitches = array('B')
+        self.velocities = array('B')
+        self.order = array('q')         # Position in the track's insertion order
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def extend(self, ticks, durations, pitches, velocities, order):
+        self.ticks.extend(ticks)
+        self.durations.extend(durations)
+        self.pitches.extend(pitches)
+        self.velocities.extend(velocities)
+        self.order.extend(order)
+
+
+class EventTable:
+    """Controller or pitch bend events of one track as parallel columns"""
+
+    def __init__(self):
+        self.ticks = array('q')
+        self.numbers = array('B')       # Controller number (0 for pitch bend)
+        self.values = array('l')        # CC value 0-127, or pitch bend -8192 to 8191
+        self.order = array('q')
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def append(self, tick, number, value, order):
+        self.ticks.append(tick)
+        self.numbers.append(number)
+        self.values.append(value)
+        self.order.append(order)
+
+
+class TrackTables:
+    """
+    Everything written to one MIDI track
+
+    Events keep a per-track insertion order, which breaks ties between events
+    of the same kind at the same tick exactly as midiutil did.
+    """
+
+    def __init__(self, name, channel=0):
+        # Track names are written as Latin-1; other characters (Japanese, say) become "?"
+        self.name = name.encode("ISO-8859-1", errors="replace")
+        self.channel = channel
+        self.notes = NoteTable()
+        self.controllers = EventTable()
+        self.pitch_bends = EventTable()
+        self.next_order = 1             # 0 is the track name
+
+    def add_notes(self, ticks, durations, pitches, velocities):
+        """Append columns of notes (times and durations in ticks)"""
+        start = self.next_order
+        self.next_order += len(ticks)
+        self.notes.extend(ticks, durations, pitches, velocities, range(start, self.next_order))
+
+    def add_controller(self, tick, controller, value):
+        self.controllers.append(tick, controller, value, self.next_order)
+        self.next_order += 1
+
+    def add_pitch_bend(self, tick, value):
+        self.pitch_bends.append(tick, 0, value, self.next_order)
+        self.next_order += 1
+
+
+def _track_chunk(track):
+    """Serialize one TrackTables to an MTrk chunk"""
+    channel = track.channel
+    # Slot 2 * order holds a note on, controller or pitch bend message and
+    # 2 * order + 1 a note off, so slots sort like midiutil's insertion order
+    messages = [0] * (2 * track.next_order)
+    keys = []
+
+    notes = track.notes
+    note_on = (NOTE_ON | channel) << 16
+    note_off = (NOTE_OFF | channel) << 16
+    for tick, duration, pitch, velocity, order in zip(notes.ticks, notes.durations, notes.pitches,
+                                                      notes.velocities, notes.order):
+        slot = order << 1
+        data = pitch << 8 | velocity
+        messages[slot] = note_on | data
+        messages[slot + 1] = note_off | data
+        keys.append(tick << TICK_SHIFT | NOTE_ON_SORT | slot)
+        keys.append((tick + duration) << TICK_SHIFT | NOTE_OFF_SORT | slot + 1)
+
+    controllers = track.controllers
+    status = (CONTROLLER | channel) << 16
+    for tick, number, value, order in zip(controllers.ticks, controllers.numbers, controllers.values,
+                                          controllers.order):
+        slot = order << 1
+        messages[slot] = status | number << 8 | value
+        keys.append(tick << TICK_SHIFT | EVENT_SORT | slot)
+
+    pitch_bends = track.pitch_bends
+    status = (PITCH_WHEEL | channel) << 16
+    for tick, value, order in zip(pitch_bends.ticks, pitch_bends.values, pitch_bends.order):
+        slot = order << 1
+        value += 8192
+        messages[slot] = status | (value & 0x7F) << 8 | value >> 7
+        keys.append(tick << TICK_SHIFT | EVENT_SORT | slot)
+
+    keys.sort()
+
+    # Track name first: it is the only event at tick 0 with sort order 0
+    data = bytearray(b'\x00\xff\x03')
+    appendVarLength(data, len(track.name))
+    data += track.name
+
+    # Identical note ons (or note offs) at the same tick keep only their first copy
+    previous_tick = 0
+    run = -1
+    seen = set()
+    for key in keys:
+        message = messages[key & SLOT_MASK]
+        if key & NOTE_OFF_SORT:
+            event_run = key >> SLOT_BITS
+            if event_run != run:
+                run = event_run
+                seen.clear()
+            dedup_key = message >> 8
+            if dedup_key in seen:
+                continue
+            seen.add(dedup_key)
+        tick = key >> TICK_SHIFT
+        delta = tick - previous_tick
+        previous_tick = tick
+        if delta < 0x80:
+            data.append(delta)
+        else:
+            appendVarLength(data, delta)
+        data += message.to_bytes(3, 'big')
+
+    data += END_OF_TRACK
+    return b'MTrk' + struct.pack('>L', len(data)) + data
+
+
+def write_midi(tracks, tempo, ticks_per_quarternote=TICKSPERQUARTERNOTE):
+    """
+    Serialize tracks to a format 1 Standard MIDI File
+
+    Args:
+        tracks: TrackTables, one per MIDI track (after a tempo track)
+        tempo: Tempo in BPM
+        ticks_per_quarternote: Resolution the ticks in the tables use
+
+    Returns:
+        The MIDI file as bytes
+    """
+    chunks = [b'MThd', struct.pack('>LHHH', 6, 1, len(tracks) + 1, ticks_per_quarternote)]
+
+    tempo_track = b'\x00\xff\x51\x03' + struct.pack('>L', int(60000000 / tempo))[1:4] + END_OF_TRACK
+    chunks.append(b'MTrk' + struct.pack('>L', len(tempo_track)) + tempo_track)
+
+    for track in tracks:
+        chunks.append(_track_chunk(track))
+    return b''.join(chunks)
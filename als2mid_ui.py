@@ -10,13 +10,13 @@ __version__ = "1.1.1"
 import tkinter as tk
 from tkinter import filedialog, scrolledtext, messagebox
 import os
-import sys
-from pathlib import Path
 import threading
 import glob
 
 # Import the converter function from the main script
-from als2mid import convert_ableton_to_midi, is_no_midi_output
+from als2mid import convert_ableton_to_midi, convert_with_cache
+from als2mid_cache import ConversionCache
+from als2mid_discovery import find_live_sets
 
 
 class ALS2MIDGui:
@@ -125,6 +125,10 @@ class ALS2MIDGui:
         tk.Checkbutton(self.multi_frame, text="Ignore Backup folders", 
                       variable=self.ignore_backups_var).pack(anchor="w", padx=10, pady=5)
         
+        self.use_cache_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.multi_frame, text="Reuse earlier conversions of unchanged files (conversion cache)", 
+                      variable=self.use_cache_var).pack(anchor="w", padx=10, pady=5)
+        
         # Convert button
         self.convert_btn_multi = tk.Button(self.multi_frame, text="Convert All Files", command=self.convert_multi, 
                                      bg="#4CAF50", fg="white", font=("Arial", 12, "bold"),
@@ -211,6 +215,11 @@ class ALS2MIDGui:
         self.log_text.see(tk.END)
         self.root.update_idletasks()
     
+    def log_message(self, message):
+        """Add a converter message to the log widget, skipping blank lines"""
+        if message.strip():
+            self.log(message.strip())
+    
     def convert_single(self):
         """Run the conversion process for single file mode"""
         input_file = self.input_var.get()
@@ -237,38 +246,19 @@ class ALS2MIDGui:
         
         # Run conversion in separate thread to prevent GUI freezing
         def run_conversion():
-            original_stdout = sys.stdout
             try:
-                # Redirect stdout to capture print statements
-                
-                class LogRedirector:
-                    def __init__(self, log_func):
-                        self.log_func = log_func
-                    
-                    def write(self, message):
-                        if message.strip():
-                            self.log_func(message.strip())
-                    
-                    def flush(self):
-                        pass
-                
-                sys.stdout = LogRedirector(self.log)
-                
                 self.log("=" * 60)
                 self.log(f"Input:  {input_file}")
                 self.log(f"Output: {output_file}")
                 self.log("=" * 60)
                 
-                # Run the actual conversion
-                convert_ableton_to_midi(input_file, output_file)
+                # Run the actual conversion, sending its messages to the log widget
+                convert_ableton_to_midi(input_file, output_file, log=self.log_message)
                 
                 self.log("=" * 60)
                 self.log("✓ Conversion completed successfully!")
                 self.log("=" * 60)
                 
-                # Restore stdout
-                sys.stdout = original_stdout
-                
                 # Show success message
                 self.root.after(0, lambda: messagebox.showinfo(
                     "Success", 
@@ -276,9 +266,6 @@ class ALS2MIDGui:
                 ))
                 
             except Exception as e:
-                # Restore stdout
-                sys.stdout = original_stdout
-                
                 error_msg = f"Error during conversion:\n{str(e)}"
                 self.log("\n" + "=" * 60)
                 self.log("✗ CONVERSION FAILED")
@@ -308,13 +295,9 @@ class ALS2MIDGui:
             messagebox.showerror("Error", f"Folder does not exist:\n{folder}")
             return
         
-        # Find all .als files
-        search_pattern = "**/*.als" if self.search_subdirs_var.get() else "*.als"
-        als_files = list(Path(folder).glob(search_pattern))
-        
-        # Filter out Backup folders if requested
-        if self.ignore_backups_var.get():
-            als_files = [f for f in als_files if "Backup" not in f.parts]
+        # Find all .als files (Backup folders are skipped without being entered)
+        als_files = list(find_live_sets(folder, recursive=self.search_subdirs_var.get(),
+                                        ignore_backups=self.ignore_backups_var.get()))
         
         if not als_files:
             messagebox.showerror("Error", f"No .als files found in:\n{folder}")
@@ -328,8 +311,13 @@ class ALS2MIDGui:
         
         # Run conversion in separate thread
         def run_multi_conversion():
-            original_stdout = sys.stdout
             output_logs = self.output_logs_var.get()
+            cache = None
+            if self.use_cache_var.get():
+                try:
+                    cache = ConversionCache()
+                except OSError as e:
+                    self.log(f"⚠ Conversion cache unavailable, converting every file: {e}")
             
             # Track conversion results
             success_count = 0
@@ -366,50 +354,22 @@ class ALS2MIDGui:
                     
                     self.log(f"\n[{idx}/{len(als_files)}] Processing: {os.path.basename(input_file)}")
                     
-                    # Setup log redirector
-                    class LogRedirector:
-                        def __init__(self, log_func, log_file=None):
-                            self.log_func = log_func
-                            self.log_file = log_file
-                            self.file_handle = None
-                            if log_file:
-                                self.file_handle = open(log_file, 'w', encoding='utf-8')
-                        
-                        def write(self, message):
-                            if message.strip():
-                                self.log_func(message.strip())
-                                if self.file_handle:
-                                    self.file_handle.write(message.strip() + "\n")
-                                    self.file_handle.flush()
-                        
-                        def flush(self):
-                            if self.file_handle:
-                                self.file_handle.flush()
-                        
-                        def close(self):
-                            if self.file_handle:
-                                self.file_handle.close()
-                    
-                    redirector = LogRedirector(self.log, log_file)
-                    sys.stdout = redirector
-                    
-                    # Capture output to detect "No MIDI tracks found"
-                    output_buffer = []
-                    original_log_func = redirector.log_func
+                    # Send conversion messages to the log widget (and the per-file log)
+                    file_handle = open(log_file, 'w', encoding='utf-8') if log_file else None
                     
-                    def buffered_log(message):
-                        output_buffer.append(message)
-                        original_log_func(message)
-                    
-                    redirector.log_func = buffered_log
+                    def log_conversion(message):
+                        self.log_message(message)
+                        if file_handle and message.strip():
+                            file_handle.write(message.strip() + "\n")
                     
                     try:
                         # Run the actual conversion
-                        convert_ableton_to_midi(input_file, output_file)
+                        if cache is not None:
+                            result = convert_with_cache(input_file, output_file, cache, log=log_conversion)
+                        else:
+                            result = convert_ableton_to_midi(input_file, output_file, log=log_conversion)
                         
-                        # Check if "No MIDI tracks found" appears in output
-                        output_text = ' '.join(output_buffer)
-                        if is_no_midi_output(output_text):
+                        if result.status == 'no_midi':
                             no_midi_count += 1
                             no_midi_files.append(os.path.basename(input_file))
                             self.log(f"  ⚠ No MIDI: {os.path.basename(input_file)}")
@@ -424,8 +384,12 @@ class ALS2MIDGui:
                         failed_files.append(os.path.basename(input_file))
                         self.log(f"  ✗ Failed: {str(e)}")
                     finally:
-                        redirector.close()
-                        sys.stdout = original_stdout
+                        if file_handle:
+                            file_handle.close()
+                
+                # Trim the cache back to its size limit
+                if cache is not None:
+                    cache.prune()
                 
                 # Build summary
                 self.log("\n" + "=" * 60)
@@ -489,9 +453,6 @@ class ALS2MIDGui:
                 self.root.after(0, lambda: messagebox.showinfo("Success", summary))
                 
             except Exception as e:
-                # Restore stdout
-                sys.stdout = original_stdout
-                
                 error_msg = f"Error during multi-file conversion:\n{str(e)}"
                 self.log("\n" + "=" * 60)
                 self.log("✗ MULTI-FILE CONVERSION FAILED")
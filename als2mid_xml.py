@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+XML backends for reading Ableton Live Sets
+
+read_live_set() streams a Live Set and reduces it to the records the
+converter works from: tempos, MIDI tracks and their clips. It uses lxml
+when it is installed - C-speed, tag-filtered iterparse with compiled XPath
+for tracks, clips, key tracks and notes - and the standard library's
+ElementTree otherwise. Both backends return identical records.
+"""
+
+import threading
+from itertools import islice
+
+BACKENDS = ('lxml', 'stdlib')
+
+# Where a MidiClip sits below its MidiTrack decides whether (and in which order) it is emitted
+TAKE_LANE_CLIP_PATH = ('TakeLanes', 'TakeLanes', 'TakeLane', 'ClipAutomation', 'Events')       # Ableton 12
+ARRANGER_CLIP_PATH = ('MainSequencer', 'ClipTimeable', 'ArrangerAutomation', 'Events')          # Ableton 11 and earlier
+SESSION_CLIP_PATH = ('MainSequencer', 'ClipSlotList', 'ClipSlot', 'ClipSlot', 'Value')          # Session view clip slots
+
+
+def _index_midi_clip(midiclip):
+    """
+    Reduce a finished <MidiClip> element to a lightweight clip record
+
+    A single pass over the clip's own children picks up the start position,
+    key tracks with their note events, and automation envelopes, kept as the
+    plain strings found in the XML so the element can be cleared afterwards.
+    """
+    clip = {
+        'time': midiclip.get('Time'),
+        'current_start': None,
+        'keytracks': None,
+        'envelopes': [],
+    }
+
+    for child in midiclip:
+        tag = child.tag
+        if tag == 'CurrentStart':
+            if clip['current_start'] is None:
+                clip['current_start'] = child.get('Value')
+
+        # Structure: MidiClip/Notes/KeyTracks/KeyTrack/Notes/MidiNoteEvent
+        elif tag == 'Notes':
+            keytracks_container = child.find('KeyTracks')
+            if keytracks_container is None or clip['keytracks'] is not None:
+                continue
+            clip['keytracks'] = []
+            for keytrack in keytracks_container.iterfind('KeyTrack'):
+                key_value = None
+                notes = None
+                for kt_child in keytrack:
+                    if kt_child.tag == 'MidiKey' and key_value is None:
+                        key_value = kt_child.get('Value')
+                    elif kt_child.tag == 'Notes' and notes is None:
+                        notes = [(n.get('Time'), n.get('Duration'), n.get('Velocity'))
+                                 for n in kt_child.iterfind('MidiNoteEvent')]
+                clip['keytracks'].append((key_value, notes))
+
+        # Automation envelopes: (PointeeId, [(Time, Value), ...])
+        elif tag == 'Envelopes':
+            for envelopes in child.iterfind('Envelopes'):
+                for clipenv in envelopes:
+                    pid = clipenv.find('EnvelopeTarget/PointeeId')
+                    events = []
+                    for automs in clipenv.iterfind('Automation/Events'):
+                        for aevents in automs:
+                            events.append((aevents.get('Time'), aevents.get('Value')))
+                    clip['envelopes'].append(
+                        (pid.get('Value') if pid is not None else None, events))
+
+    return clip
+
+
+def _clip_has_notes(clip):
+    """Check whether a clip record holds at least one note event"""
+    return any(notes for _, notes in clip['keytracks'] or ())
+
+
+def _read_live_set_stdlib(source):
+    """
+    Stream an Ableton Live Set XML document and index its MIDI tracks (ElementTree)
+    
+    The document is read once with iterparse. Each finished MidiClip is
+    reduced to a clip record and filed under its track by where it sits
+    (TakeLanes, arranger or session clip slot); the track name is picked up
+    on the way past. Finished clips, tracks and top-level LiveSet sections
+    are cleared straight away, so memory use does not grow with set size and
+    no subtree is ever searched twice.
+
+    """
+    import xml.etree.ElementTree as ET
+    
+    tempos = []
+    ableton = {}
+    tracks_found = {}   # <Tracks> element -> list of track records
+    last_tracks = None
+    stack = []
+    
+    # Index of the MidiTrack currently being read
+    track = None
+    track_depth = 0
+    track_named = False
+    has_notes = False
+    take_lane_clips, arranger_clips, session_clips = [], [], []
+
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'Ableton' and not stack:
+                ableton = dict(elem.attrib)
+            elif elem.tag == 'Tracks':
+                tracks_found[elem] = []
+                last_tracks = elem
+            elif elem.tag == 'MidiTrack' and track is None and stack and stack[-1].tag == 'Tracks':
+                track = {'name': None, 'has_notes': False, 'clips': []}
+                track_depth = len(stack) + 1
+                track_named = False
+                has_notes = False
+                take_lane_clips, arranger_clips, session_clips = [], [], []
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+        tag = elem.tag
+
+        if tag == 'Tempo':
+            manual = elem.find('Manual')
+            if manual is not None:
+                tempos.append(manual.get('Value'))
+
+        if parent is None:
+            continue
+
+        if track is not None and len(stack) >= track_depth:
+            # Inside a MidiTrack: index clips and the track name as they complete
+            if tag == 'MidiClip':
+                clip = _index_midi_clip(elem)
+                has_notes = has_notes or _clip_has_notes(clip)
+                location = tuple(e.tag for e in stack[-5:])
+                if location == TAKE_LANE_CLIP_PATH:
+                    take_lane_clips.append(clip)
+                elif location[-4:] == ARRANGER_CLIP_PATH:
+                    arranger_clips.append(clip)
+                elif location == SESSION_CLIP_PATH:
+                    session_clips.append(clip)
+                elem.clear()
+                parent.remove(elem)
+            elif tag == 'EffectiveName' and parent.tag == 'Name' and not track_named:
+                track['name'] = elem.get('Value')
+                track_named = True
+            continue
+
+        if parent.tag == 'Tracks':
+            if tag == 'MidiTrack' and track is not None:
+                track['has_notes'] = has_notes
+                track['clips'] = take_lane_clips + arranger_clips + session_clips
+                tracks_found[parent].append(track)
+                track = None
+        elif len(stack) != 2:
+            # Keep everything below a top-level LiveSet section until that section ends
+            continue
+
+        # Finished subtree: drop it so the in-memory tree stays small
+        elem.clear()
+        parent.remove(elem)
+
+    found = tracks_found.get(last_tracks, [])
+    return {
+        'tempos': tempos,
+        'ableton': ableton,
+        'midi_tracks': found,
+        'total_tracks': len(found) if last_tracks is not None else None,
+    }
+
+
+# lxml backend: compiled on first use
+_lxml = None
+_lxml_checked = False
+_lxml_lock = threading.Lock()
+_xpath = {}
+
+
+def _load_lxml():
+    """Import lxml.etree and compile the XPath expressions (once); None if lxml isn't installed"""
+    global _lxml, _lxml_checked, _xpath
+    if _lxml_checked:
+        return _lxml
+    # The --serve server and AsyncConverter with threads may make the first call from several threads
+    with _lxml_lock:
+        if not _lxml_checked:
+            try:
+                from lxml import etree
+            except ImportError:
+                etree = None
+            if etree is not None:
+                xpath = {}
+                for name, path in (
+                        ('outer_track', 'ancestor::MidiTrack[parent::Tracks]'),
+                        ('track_name', '(.//Name/EffectiveName)[1]'),
+                        ('midi_clips', './/MidiClip'),
+                        ('current_start', 'CurrentStart/@Value'),
+                        ('keytracks_container', '(Notes/KeyTracks)[1]'),
+                        ('keytracks', 'KeyTrack'),
+                        ('midi_key', 'MidiKey/@Value'),
+                        ('note_events', 'MidiNoteEvent'),
+                        ('clip_envelopes', 'Envelopes/Envelopes/*'),
+                        ('automation_events', 'Automation/Events/*')):
+                    xpath[name] = etree.XPath(path, smart_strings=False)
+                # Published only once complete
+                _xpath = xpath
+                _lxml = etree
+            _lxml_checked = True
+    return _lxml
+
+
+def xml_backend():
+    """Name of the backend read_live_set() uses by default: 'lxml' if installed, else 'stdlib'"""
+    return 'lxml' if _load_lxml() is not None else 'stdlib'
+
+
+def _index_midi_clip_lxml(midiclip):
+    """_index_midi_clip() for an lxml element, using compiled XPath"""
+    xpath = _xpath
+    current_start = xpath['current_start'](midiclip)
+    clip = {
+        'time': midiclip.get('Time'),
+        'current_start': current_start[0] if current_start else None,
+        'keytracks': None,
+        'envelopes': [],
+    }
+
+    container = xpath['keytracks_container'](midiclip)
+    if container:
+        clip['keytracks'] = []
+        for keytrack in xpath['keytracks'](container[0]):
+            key_value = xpath['midi_key'](keytrack)
+            notes_element = keytrack.find('Notes')
+            notes = None
+            if notes_element is not None:
+                notes = [(n.get('Time'), n.get('Duration'), n.get('Velocity'))
+                         for n in xpath['note_events'](notes_element)]
+            clip['keytracks'].append((key_value[0] if key_value else None, notes))
+
+    for clipenv in xpath['clip_envelopes'](midiclip):
+        pid = clipenv.find('EnvelopeTarget/PointeeId')
+        events = [(event.get('Time'), event.get('Value')) for event in xpath['automation_events'](clipenv)]
+        clip['envelopes'].append((pid.get('Value') if pid is not None else None, events))
+
+    return clip
+
+
+def _index_midi_track_lxml(miditrack):
+    """Build a track record from a finished lxml <MidiTrack> element"""
+    name = _xpath['track_name'](miditrack)
+    track = {'name': name[0].get('Value') if name else None, 'has_notes': False, 'clips': []}
+    has_notes = False
+    take_lane_clips, arranger_clips, session_clips = [], [], []
+
+    for midiclip in _xpath['midi_clips'](miditrack):
+        clip = _index_midi_clip_lxml(midiclip)
+        has_notes = has_notes or _clip_has_notes(clip)
+        location = tuple(ancestor.tag for ancestor in islice(midiclip.iterancestors(), 5))[::-1]
+        if location == TAKE_LANE_CLIP_PATH:
+            take_lane_clips.append(clip)
+        elif location[-4:] == ARRANGER_CLIP_PATH:
+            arranger_clips.append(clip)
+        elif location == SESSION_CLIP_PATH:
+            session_clips.append(clip)
+
+    track['has_notes'] = has_notes
+    track['clips'] = take_lane_clips + arranger_clips + session_clips
+    return track
+
+
+def _drop_finished(elem):
+    """Free a finished element and the siblings read before it"""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _read_live_set_lxml(source):
+    """
+    Stream an Ableton Live Set XML document and index its MIDI tracks (lxml)
+
+    iterparse only reports the few tags that matter. Each top-level track is
+    indexed with compiled XPath once it is complete, then freed together with
+    everything before it, so at most one track is held in memory at a time.
+    """
+    etree = _load_lxml()
+
+    tempos = []
+    ableton = {}
+    tracks_found = {}   # <Tracks> element -> list of track records
+    last_tracks = None
+
+    # Whitespace and xml:id lookups are never read, so the parser skips them
+    events = etree.iterparse(source, events=('start', 'end'), huge_tree=True,
+                             remove_blank_text=True, collect_ids=False,
+                             tag=('Ableton', 'Tracks', 'Tempo', 'MidiTrack', 'AudioTrack', 'GroupTrack',
+                                  'ReturnTrack'))
+    for event, elem in events:
+        tag = elem.tag
+        if event == 'start':
+            if tag == 'Tracks':
+                tracks_found[elem] = []
+                last_tracks = elem
+            elif tag == 'Ableton' and elem.getparent() is None:
+                ableton = dict(elem.attrib)
+            continue
+
+        if tag == 'Tempo':
+            manual = elem.find('Manual')
+            if manual is not None:
+                tempos.append(manual.get('Value'))
+            continue
+        if tag == 'Tracks':
+            continue
+
+        parent = elem.getparent()
+        if parent is None or parent.tag != 'Tracks' or _xpath['outer_track'](elem):
+            # Not a track of its own: part of the track that contains it
+            continue
+        if tag == 'MidiTrack':
+            tracks_found[parent].append(_index_midi_track_lxml(elem))
+        _drop_finished(elem)
+
+    found = tracks_found.get(last_tracks, [])
+    return {
+        'tempos': tempos,
+        'ableton': ableton,
+        'midi_tracks': found,
+        'total_tracks': len(found) if last_tracks is not None else None,
+    }
+
+
+def read_live_set(source, backend=None):
+    """
+    Stream an Ableton Live Set XML document and index its MIDI tracks
+
+    Args:
+        source: Filename or binary file object containing the Live Set XML
+        backend: 'lxml', 'stdlib', or None for lxml when it is installed
+
+    Returns:
+        Dict with 'tempos' (raw Tempo/Manual values in document order),
+        'ableton' (attributes of the <Ableton> root element, such as
+        MinorVersion and Creator), 'midi_tracks' (a record of every
+        MidiTrack in the last <Tracks> element, with its clips and a
+        'has_notes' flag) and 'total_tracks' (number of MidiTrack elements in
+        that <Tracks>, or None if the document has no <Tracks> element)
+    """
+    if backend is None:
+        backend = xml_backend()
+    if backend == 'lxml':
+        if _load_lxml() is None:
+            raise ImportError('The lxml XML backend needs lxml installed')
+        return _read_live_set_lxml(source)
+    if backend == 'stdlib':
+        return _read_live_set_stdlib(source)
+    raise ValueError(f"Unknown XML backend: {backend} (choose from {', '.join(BACKENDS)})")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark the converter over testfiles/, scaled-up copies of them and
+synthetic sets from generate_live_set.py
+
+Each set is converted in a fresh process (so peak RSS belongs to that set
+alone), entirely in memory, a few times; the fastest run of each phase is
+kept. Results are compared against a stored baseline and the script exits
+with status 1 when a phase got slower than the threshold allows.
+
+Baselines are machine specific: save one with --save-baseline on the
+machine you compare on, before making the change you want to measure.
+
+Usage:
+    python dev/benchmark.py --save-baseline
+    python dev/benchmark.py                       # compare against it
+    python dev/benchmark.py --scale 4 16 --repeat 5 --threshold 0.15
+    python dev/benchmark.py --synthetic 64 256     # synthetic sets with 64 and 256 MIDI tracks
+"""
+
+import argparse
+import copy
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+from generate_live_set import generate_live_set
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+TESTFILES = ['test11.als', 'v12.als', 'v11Large.als', 'MoreThan16.als']
+SCALED_SOURCE = 'v11Large.als'      # Scaled up by repeating its MIDI tracks
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+PHASES = ('parse', 'convert', 'write', 'total')
+MIN_SLACK_MS = 5.0                  # Ignore regressions smaller than this (timer noise on small sets)
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None where unsupported)"""
+    # On Linux ru_maxrss survives exec, so a child would report the parent's
+    # peak (e.g. from scaling a set); VmHWM starts afresh with each program
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def scale_live_set(source_path, factor, output_path):
+    """Write a gzipped copy of a Live Set with every MidiTrack repeated factor times"""
+    import xml.etree.ElementTree as ET
+
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    root = ET.fromstring(data)
+    tracks = root.find('LiveSet/Tracks')
+    midi_tracks = tracks.findall('MidiTrack')
+    for _ in range(factor - 1):
+        for track in midi_tracks:
+            tracks.append(copy.deepcopy(track))
+    with gzip.open(output_path, 'wb', compresslevel=1) as f:
+        f.write(ET.tostring(root))
+
+
+def run_child(path, repeat):
+    """Convert one set repeat times in this process and print its measurements as JSON"""
+    from als2mid import convert_bytes
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    best = {}
+    for _ in range(repeat):
+        started = perf_counter()
+        result = convert_bytes(data, os.path.basename(path))
+        timings = dict(result.timings, total=perf_counter() - started)
+        for phase in PHASES:
+            best[phase] = min(best.get(phase, float('inf')), timings.get(phase, 0.0))
+    events = result.note_count + result.cc_count + result.pitch_bend_count
+    print(json.dumps({
+        'ms': {phase: seconds * 1000 for phase, seconds in best.items()},
+        'peak_rss_mb': peak_rss_mb(),
+        'events': events,
+        'events_per_sec': events / best['total'] if best['total'] else 0.0,
+        'files': len(result.midi_data),
+    }))
+
+
+def measure(path, repeat):
+    """Run run_child() for one set in a fresh interpreter"""
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', path, '--repeat', str(repeat)],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f'Benchmark of {path} failed:\n{completed.stderr}')
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def compare(name, current, baseline, threshold):
+    """Return a list of regression messages for one set"""
+    problems = []
+    for phase in PHASES:
+        now = current['ms'].get(phase, 0.0)
+        before = baseline['ms'].get(phase)
+        if before is None:
+            continue
+        if now > before * (1 + threshold) and now - before > MIN_SLACK_MS:
+            problems.append(f'{name} {phase}: {now:.1f} ms vs baseline {before:.1f} ms (+{(now / before - 1) * 100:.0f}%)')
+    now_rss, before_rss = current.get('peak_rss_mb'), baseline.get('peak_rss_mb')
+    if now_rss and before_rss and now_rss > before_rss * (1 + threshold):
+        problems.append(f'{name} peak RSS: {now_rss:.1f} MB vs baseline {before_rss:.1f} MB '
+                        f'(+{(now_rss / before_rss - 1) * 100:.0f}%)')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark als2mid and compare against a stored baseline')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per set; the fastest is kept (default: 5)')
+    parser.add_argument('--scale', type=int, nargs='*', default=[4],
+                        help=f'Also benchmark {SCALED_SOURCE} with its MIDI tracks repeated N times (default: 4)')
+    parser.add_argument('--synthetic', type=int, nargs='*', default=[64],
+                        help='Also benchmark generated Ableton 12 sets with N MIDI tracks of mixed clips (default: 64)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown per phase as a fraction (default: 0.25 = 25%%)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.repeat)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='als2mid-bench-') as scratch:
+        sets = [(os.path.splitext(name)[0], os.path.join(ROOT, 'testfiles', name)) for name in TESTFILES]
+        for factor in args.scale:
+            scaled_path = os.path.join(scratch, f'scaled_x{factor}.als')
+            scale_live_set(os.path.join(ROOT, 'testfiles', SCALED_SOURCE), factor, scaled_path)
+            sets.append((f'v11Large_x{factor}', scaled_path))
+        for tracks in args.synthetic:
+            synthetic_path = os.path.join(scratch, f'synthetic_{tracks}.als')
+            generate_live_set(synthetic_path, tracks=tracks, clips=8, layout='mixed', version=12,
+                              keytracks=8, notes=16, envelopes=2)
+            sets.append((f'synthetic_{tracks}', synthetic_path))
+
+        print(f"{'Set':<16}{'parse ms':>10}{'convert ms':>12}{'write ms':>10}{'total ms':>10}"
+              f"{'peak MB':>9}{'events':>9}{'events/s':>11}")
+        for name, path in sets:
+            current = measure(path, args.repeat)
+            results[name] = current
+            ms = current['ms']
+            rss = f"{current['peak_rss_mb']:.1f}" if current['peak_rss_mb'] else '-'
+            print(f"{name:<16}{ms['parse']:>10.1f}{ms['convert']:>12.1f}{ms['write']:>10.1f}{ms['total']:>10.1f}"
+                  f"{rss:>9}{current['events']:>9}{current['events_per_sec']:>11.0f}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nBaseline saved: {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f'\nNo baseline at {args.baseline} - run with --save-baseline first')
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    problems = []
+    for name, current in results.items():
+        if name in baseline:
+            problems.extend(compare(name, current, baseline[name], args.threshold))
+
+    print()
+    if problems:
+        print(f'✗ {len(problems)} regression(s) beyond {args.threshold:.0%}:')
+        for problem in problems:
+            print(f'  {problem}')
+        sys.exit(1)
+    print(f'✓ No regressions beyond {args.threshold:.0%} against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Ableton Live Sets for scale and memory testing
+
+Writes Ableton 11 or 12 style .als files (gzipped like Live saves them, or
+plain XML) with the structures convert_ableton_to_midi() reads: MidiTracks
+with named clips in arranger, session clip slots or Ableton 12 TakeLanes,
+KeyTracks of MidiNoteEvents and clip automation envelopes. The XML is
+streamed to disk, so sets of hundreds of MB can be generated in little
+memory. Prints the note, CC and pitch bend counts the converter should
+report for the set.
+
+Usage:
+    python dev/generate_live_set.py big.als --tracks 64 --clips 32 --notes 64
+    python dev/generate_live_set.py v12.als --version 12 --layout takelanes --plain
+    python dev/generate_live_set.py huge.als --tracks 128 --clips 64 --notes 128 --verify
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+
+LAYOUTS = ('arranger', 'session', 'takelanes', 'mixed')
+CLIP_LENGTH = 16.0          # Beats per clip; clips are laid end to end
+PRE_ROLL_TIME = -63072000   # Time of the default value event Live writes first in every envelope
+TRACKS_PER_FILE = 16
+
+# Envelope targets cycled through per clip: (PointeeId, is_pitch_bend), all in als2mid's AUTOMATION_MAP
+ENVELOPE_TARGETS = [(16203, False), (16207, False), (16200, True), (16208, False), (16204, False), (16209, False)]
+
+
+def _clip_layouts(layout, clips):
+    """Where each of a track's clips goes"""
+    if layout != 'mixed':
+        return [layout] * clips
+    return [LAYOUTS[index % 3] for index in range(clips)]
+
+
+def _write_clip(out, clip_id, start, keytracks, notes, envelopes, envelope_points):
+    """Write one <MidiClip> and return (notes, cc events, pitch bend events) it contributes"""
+    out.write(f'<MidiClip Id="{clip_id}" Time="{start}">'
+              f'<LomId Value="0" /><CurrentStart Value="{start}" /><CurrentEnd Value="{start + CLIP_LENGTH}" />'
+              f'<Name Value="Clip {clip_id}" /><Color Value="{clip_id % 70}" />')
+
+    cc_events = pitch_bend_events = 0
+    out.write('<Envelopes><Envelopes>')
+    for envelope in range(envelopes):
+        pointee_id, is_pitch_bend = ENVELOPE_TARGETS[envelope % len(ENVELOPE_TARGETS)]
+        out.write(f'<ClipEnvelope Id="{envelope}"><EnvelopeTarget><PointeeId Value="{pointee_id}" /></EnvelopeTarget>'
+                  f'<Automation><Events><FloatEvent Id="0" Time="{PRE_ROLL_TIME}" Value="0" />')
+        for point in range(1, envelope_points):
+            time = CLIP_LENGTH * point / envelope_points
+            value = (point * 517) % 16384 - 8192 if is_pitch_bend else (point * 7) % 128
+            out.write(f'<FloatEvent Id="{point}" Time="{time}" Value="{value}" />')
+        out.write('</Events><AutomationTransformViewState><IsTransformPending Value="false" />'
+                  '</AutomationTransformViewState></Automation></ClipEnvelope>')
+        if is_pitch_bend:
+            pitch_bend_events += envelope_points
+        else:
+            cc_events += envelope_points
+    out.write('</Envelopes></Envelopes>')
+
+    out.write('<Notes><KeyTracks>')
+    note_id = 1
+    step = CLIP_LENGTH / notes if notes else CLIP_LENGTH
+    for keytrack in range(keytracks):
+        out.write(f'<KeyTrack Id="{keytrack}"><Notes>')
+        for note in range(notes):
+            velocity = 64 + (note + keytrack) % 63
+            out.write(f'<MidiNoteEvent Time="{note * step}" Duration="{step / 2}" Velocity="{velocity}" '
+                      f'VelocityDeviation="0" OffVelocity="64" Probability="1" IsEnabled="true" NoteId="{note_id}" />')
+            note_id += 1
+        out.write(f'</Notes><MidiKey Value="{36 + keytrack % 92}" /></KeyTrack>')
+    out.write('</KeyTracks><PerNoteEventStore><EventLists /></PerNoteEventStore></Notes></MidiClip>')
+
+    return keytracks * notes, cc_events, pitch_bend_events
+
+
+def _write_track(out, track_index, clip_layouts, keytracks, notes, envelopes, envelope_points, counts):
+    """Write one <MidiTrack> with its clips in the requested places"""
+    out.write(f'<MidiTrack Id="{track_index + 10}"><LomId Value="0" />'
+              f'<Name><EffectiveName Value="Synth {track_index + 1}" /><UserName Value="Synth {track_index + 1}" />'
+              f'<Annotation Value="" /></Name><Color Value="{track_index % 70}" />')
+
+    placed = {layout: [] for layout in LAYOUTS}
+    for clip_index, layout in enumerate(clip_layouts):
+        placed[layout].append(clip_index)
+
+    def clips(indices):
+        for clip_index in indices:
+            clip_counts = _write_clip(out, track_index * 1000 + clip_index, clip_index * CLIP_LENGTH,
+                                      keytracks, notes, envelopes, envelope_points)
+            for key, value in zip(('notes', 'cc_events', 'pitch_bend_events'), clip_counts):
+                counts[key] += value
+
+    # Ableton 12 take lanes sit directly below the track
+    out.write('<TakeLanes><TakeLanes>')
+    if placed['takelanes']:
+        out.write('<TakeLane Id="0"><Name Value="Take 1" /><ClipAutomation><Events>')
+        clips(placed['takelanes'])
+        out.write('</Events></ClipAutomation></TakeLane>')
+    out.write('</TakeLanes></TakeLanes>')
+
+    out.write('<DeviceChain><MainSequencer><ClipTimeable><ArrangerAutomation><Events>')
+    clips(placed['arranger'])
+    out.write('</Events></ArrangerAutomation></ClipTimeable><ClipSlotList>')
+    for slot, clip_index in enumerate(placed['session']):
+        out.write(f'<ClipSlot Id="{slot}"><LomId Value="0" /><ClipSlot><Value>')
+        clips([clip_index])
+        out.write('</Value></ClipSlot><HasStop Value="true" /></ClipSlot>')
+    out.write('</ClipSlotList></MainSequencer><Mixer><Volume><Manual Value="1" /></Volume></Mixer>'
+              '</DeviceChain></MidiTrack>')
+
+
+def generate_live_set(path, tracks=16, clips=4, layout='arranger', version=11, keytracks=8, notes=16,
+                      envelopes=1, envelope_points=16, tempo=120, compress=True):
+    """
+    Write a synthetic Live Set
+
+    Args:
+        path: Output .als path
+        tracks: Number of MidiTracks
+        clips: Clips per track
+        layout: 'arranger', 'session', 'takelanes' (Ableton 12 only) or
+            'mixed' (clips alternate between the three)
+        version: 11 or 12 (decides the header and Master/Main track naming)
+        keytracks: KeyTracks (distinct pitches) per clip
+        notes: MidiNoteEvents per KeyTrack
+        envelopes: Automation envelopes per clip
+        envelope_points: Events per envelope, including Live's pre-roll event
+        tempo: Song tempo in BPM
+        compress: Gzip the file like Live does (False writes plain XML)
+
+    Returns:
+        Dict of the counts convert_ableton_to_midi() should report
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f'layout must be one of {", ".join(LAYOUTS)}')
+    if version not in (11, 12):
+        raise ValueError('version must be 11 or 12')
+    if version == 11 and layout in ('takelanes', 'mixed'):
+        raise ValueError('TakeLanes only exist in Ableton 12 sets')
+
+    counts = {'notes': 0, 'cc_events': 0, 'pitch_bend_events': 0}
+    clip_layouts = _clip_layouts(layout, clips)
+    creator = 'Ableton Live 12.1.5' if version == 12 else 'Ableton Live 11.3.13'
+    minor = '12.0_12117' if version == 12 else '11.0_11300'
+    main_track = 'MainTrack' if version == 12 else 'MasterTrack'
+
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', encoding='utf-8') as out:
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write(f'<Ableton MajorVersion="5" MinorVersion="{minor}" SchemaChangeCount="3" '
+                  f'Creator="{creator}" Revision="synthetic">\n<LiveSet><NextPointeeId Value="100000" />'
+                  f'<OverwriteProtectionNumber Value="2816" /><LomId Value="0" /><Tracks>\n')
+        for track_index in range(tracks):
+            _write_track(out, track_index, clip_layouts, keytracks, notes, envelopes, envelope_points, counts)
+            out.write('\n')
+        out.write(f'</Tracks><{main_track}><LomId Value="0" /><Name><EffectiveName Value="Main" /></Name>'
+                  f'<DeviceChain><Mixer><Tempo><LomId Value="0" /><Manual Value="{tempo}" /></Tempo></Mixer>'
+                  f'</DeviceChain></{main_track}></LiveSet>\n</Ableton>\n')
+
+    has_notes = tracks > 0 and clips > 0 and keytracks > 0 and notes > 0
+    if not has_notes:
+        # Tracks without notes are skipped along with their automation
+        counts = {'notes': 0, 'cc_events': 0, 'pitch_bend_events': 0}
+    counts.update({
+        'midi_tracks': tracks,
+        'tracks_with_notes': tracks if has_notes else 0,
+        'midi_files': -(-tracks // TRACKS_PER_FILE) if has_notes else 0,
+        'tempo': tempo,
+        'size_bytes': os.path.getsize(path),
+    })
+    return counts
+
+
+def verify(path, expected):
+    """Convert the generated set in memory and compare the converter's counts with the expected ones"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from als2mid import QUIET, convert_ableton_to_midi
+
+    result = convert_ableton_to_midi(path, os.path.splitext(path)[0] + '.mid', log=lambda message: None,
+                                     verbosity=QUIET, write_output=lambda name, midi_data: None)
+    actual = {
+        'notes': result.note_count,
+        'cc_events': result.cc_count,
+        'pitch_bend_events': result.pitch_bend_count,
+        'tracks_with_notes': result.track_count,
+        'midi_files': len(result.output_files),
+        'tempo': result.tempo if result.status == 'success' else expected['tempo'],
+    }
+    mismatches = [f'{key}: expected {expected[key]}, converter reported {value}'
+                  for key, value in actual.items() if expected[key] != value]
+    return result, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Ableton Live Set for scale testing')
+    parser.add_argument('output', help='Output .als file')
+    parser.add_argument('--version', type=int, choices=(11, 12), default=11, help='Ableton version style (default: 11)')
+    parser.add_argument('--layout', choices=LAYOUTS, default='arranger',
+                        help='Where clips go: arranger, session clip slots, Ableton 12 takelanes, or mixed (default: arranger)')
+    parser.add_argument('--tracks', type=int, default=16, help='MIDI tracks (default: 16)')
+    parser.add_argument('--clips', type=int, default=4, help='Clips per track (default: 4)')
+    parser.add_argument('--keytracks', type=int, default=8, help='Pitches per clip (default: 8)')
+    parser.add_argument('--notes', type=int, default=16, help='Notes per key track (default: 16)')
+    parser.add_argument('--envelopes', type=int, default=1, help='Automation envelopes per clip (default: 1)')
+    parser.add_argument('--envelope-points', type=int, default=16, help='Events per envelope (default: 16)')
+    parser.add_argument('--tempo', type=int, default=120, help='Tempo in BPM (default: 120)')
+    parser.add_argument('--plain', action='store_true', help='Write plain XML instead of gzipping')
+    parser.add_argument('--verify', action='store_true', help='Convert the set and check the counts match')
+    args = parser.parse_args()
+
+    try:
+        expected = generate_live_set(args.output, tracks=args.tracks, clips=args.clips, layout=args.layout,
+                                     version=args.version, keytracks=args.keytracks, notes=args.notes,
+                                     envelopes=args.envelopes, envelope_points=args.envelope_points,
+                                     tempo=args.tempo, compress=not args.plain)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(expected, indent=2))
+
+    if args.verify:
+        result, mismatches = verify(args.output, expected)
+        if mismatches:
+            print('✗ Converter counts differ:')
+            for mismatch in mismatches:
+                print(f'  {mismatch}')
+            sys.exit(1)
+        print(f'✓ Converter counts match ({result.status}, {sum(result.timings.get(p, 0) for p in ("parse", "convert", "write")):.2f}s)')
+
+
+if __name__ == '__main__':
+    main()
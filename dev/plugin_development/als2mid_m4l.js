@@ -928,13 +928,13 @@ function performExport(alsPath) {
     if (os === "windows") {
         scriptContent = '@echo off\n';
         scriptContent += 'cd /d "' + exportFolder + '"\n';
-        scriptContent += als2midCmd + ' "' + alsPath + '" -o "' + outputPath + '" > "' + exportFolder + '/als2mid_error.log" 2>&1\n';
+        scriptContent += als2midCmd + ' "' + alsPath + '" -o "' + outputPath + '" --use-server > "' + exportFolder + '/als2mid_error.log" 2>&1\n';
         scriptContent += 'if %errorlevel% neq 0 pause\n';
         scriptContent += 'del "%~f0"\n';
     } else {
         scriptContent = '#!/bin/bash\n';
         scriptContent += 'cd "' + exportFolder + '"\n';
-        scriptContent += als2midCmd + ' "' + alsPath + '" -o "' + outputPath + '" > "' + exportFolder + '/als2mid_error.log" 2>&1\n';
+        scriptContent += als2midCmd + ' "' + alsPath + '" -o "' + outputPath + '" --use-server > "' + exportFolder + '/als2mid_error.log" 2>&1\n';
         scriptContent += 'if [ $? -ne 0 ]; then\n';
         scriptContent += '  read -p "Press Enter to continue..."\n';
         scriptContent += 'fi\n';
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test that every XML backend and note path writes the same MIDI bytes
+
+Converts testfiles/*.als with the stdlib and lxml XML backends, each with
+the pure-Python and the NumPy note path, and compares the MIDI files with
+those of stdlib + pure Python. Combinations whose optional package isn't
+installed are skipped.
+"""
+
+import glob
+import os
+import sys
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import als2mid
+import als2mid_notes
+import als2mid_xml
+
+TESTFILES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'testfiles', '*.als')))
+
+
+def have_module(name):
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+def convert(path, backend, note_path):
+    """MIDI bytes of one set, read with the given XML backend and note path"""
+    read_live_set = als2mid.read_live_set
+    numpy_min_notes = als2mid_notes.NUMPY_MIN_NOTES
+    als2mid.read_live_set = partial(als2mid_xml.read_live_set, backend=backend)
+    # 'numpy' sends every clip with notes down the NumPy path, 'python' none
+    als2mid_notes.NUMPY_MIN_NOTES = 1 if note_path == 'numpy' else float('inf')
+    try:
+        with open(path, 'rb') as f:
+            result = als2mid.convert_bytes(f.read(), os.path.basename(path))
+    finally:
+        als2mid.read_live_set = read_live_set
+        als2mid_notes.NUMPY_MIN_NOTES = numpy_min_notes
+    return result.midi_data
+
+
+def test_backends_match():
+    """Every backend and note path writes the reference bytes for every test file"""
+    combinations = [('stdlib', 'python')]
+    if have_module('numpy'):
+        combinations.append(('stdlib', 'numpy'))
+    if have_module('lxml'):
+        combinations.append(('lxml', 'python'))
+        if have_module('numpy'):
+            combinations.append(('lxml', 'numpy'))
+
+    print(f"Comparing {', '.join('+'.join(c) for c in combinations[1:]) or 'nothing'} against stdlib+python")
+    assert TESTFILES, "No test files found"
+    for path in TESTFILES:
+        reference = convert(path, 'stdlib', 'python')
+        assert reference, f"{os.path.basename(path)}: no MIDI written"
+        for backend, note_path in combinations[1:]:
+            midi_data = convert(path, backend, note_path)
+            assert midi_data == reference, f"{os.path.basename(path)}: {backend}+{note_path} differs"
+        print(f"  ✓ {os.path.basename(path)}: {len(reference)} MIDI file(s) identical")
+
+
+if __name__ == '__main__':
+    test_backends_match()
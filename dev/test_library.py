@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test the --query filters of the Live Set library
+
+Stores a few hand-made set records in a temporary library and checks which
+sets each filter finds: numeric comparisons, case-insensitive text matches,
+'~' with LIKE's wildcards in the value, '!=' on track names and automation
+targets (sets with no such track at all), and invalid filters.
+"""
+
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from als2mid_library import LiveSetLibrary, parse_filter
+
+STAT = SimpleNamespace(st_size=1, st_mtime_ns=1)
+
+
+def record(tempo, tracks, automation=(), live_version=12, creator='Ableton Live 12.0.5'):
+    return {
+        'tempo': tempo,
+        'live_version': live_version,
+        'minor_version': f'{live_version}.0_12049',
+        'creator': creator,
+        'midi_tracks': len(tracks),
+        'clips': len(tracks),
+        'notes': 10 * len(tracks),
+        'tracks': [{'name': name, 'clips': 1, 'notes': 10} for name in tracks],
+        'automation': list(automation),
+    }
+
+
+SETS = {
+    'bass.als': record(128, ['Bass', 'Drums'], [(16, 'Modulation', 4)]),
+    'percent.als': record(128, ['100% Wet', 'Keys']),
+    'underscore.als': record(90, ['lead_1'], [(1234, None, 2)]),
+    'backslash.als': record(120.5, ['C:\\Synth'], live_version=11, creator='Ableton Live 11.3.2'),
+    'empty.als': record(140, []),
+}
+
+
+def query(library, folder, *filters):
+    return sorted(os.path.basename(match['path']) for match in library.query(filters, folder=folder))
+
+
+def test_query_filters():
+    """Every filter finds exactly the sets it should"""
+    with tempfile.TemporaryDirectory() as folder:
+        with LiveSetLibrary(os.path.join(folder, 'library.sqlite')) as library:
+            for name, set_record in SETS.items():
+                library.store(os.path.join(folder, 'sets', name), STAT, 'test', set_record)
+            library.store(os.path.join(folder, 'sets', 'broken.als'), STAT, 'test', error='Unreadable')
+            sets = os.path.join(folder, 'sets')
+
+            cases = [
+                # Numeric fields
+                (['tempo=128'], ['bass.als', 'percent.als']),
+                (['tempo>=120', 'tempo<128'], ['backslash.als']),
+                (['tempo!=128', 'midi_tracks>0'], ['backslash.als', 'underscore.als']),
+                (['live<12'], ['backslash.als']),
+                # Text fields ignore case with = and contain with ~
+                (['creator=ableton live 11.3.2'], ['backslash.als']),
+                (['version~12.0'], ['bass.als', 'empty.als', 'percent.als', 'underscore.als']),
+                # LIKE wildcards in the value match only themselves
+                (['track~%'], ['percent.als']),
+                (['track~_'], ['underscore.als']),
+                (['track~:\\'], ['backslash.als']),
+                (['track~bass'], ['bass.als']),
+                (['track=drums'], ['bass.als']),
+                # != on tracks means no such track, including sets without tracks
+                (['track!=bass'], ['backslash.als', 'empty.als', 'percent.als', 'underscore.als']),
+                # Automation matches its name or its PointeeId
+                (['automation=modulation'], ['bass.als']),
+                (['automation=1234'], ['underscore.als']),
+                (['automation!=modulation', 'tempo=128'], ['percent.als']),
+            ]
+            for filters, expected in cases:
+                assert query(library, sets, *filters) == expected, \
+                    f"{filters}: {query(library, sets, *filters)} != {expected}"
+
+            # Only the folder's sets are searched, and failed sets are never returned
+            assert query(library, os.path.join(folder, 'elsewhere'), 'tempo>0') == []
+            assert 'broken.als' not in query(library, sets)
+    print(f"  ✓ {len(cases)} query filters")
+
+
+def test_invalid_filters():
+    """Malformed filters raise ValueError with a message"""
+    for text in ('tempo', 'tempo=fast', 'tempo~128', 'color=red', 'track<bass', 'track!~a', 'creator>=a'):
+        try:
+            parse_filter(text)
+        except ValueError as e:
+            assert str(e)
+        else:
+            raise AssertionError(f"'{text}' was accepted")
+    print("  ✓ Invalid filters rejected")
+
+
+if __name__ == '__main__':
+    test_query_filters()
+    test_invalid_filters()
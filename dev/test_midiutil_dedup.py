@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test that MIDITrack.removeDuplicates() writes the same bytes as set() did
+
+Builds random chord-heavy MIDI files, with repeated notes, program changes,
+controller and pitch wheel events at shared ticks, and writes each with the
+sort-and-sweep removeDuplicates() and with the original set()-based one.
+"""
+
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from midiutil_v1_2_1 import MIDIFile, MIDITrack, sort_events
+
+
+def set_remove_duplicates(self):
+    """removeDuplicates() as midiutil 1.2.1 shipped it"""
+    s = set(self.eventList)
+    self.eventList = list(s)
+    self.eventList.sort(key=sort_events)
+
+
+def random_midi_file(rng, tracks=3, chords=200):
+    """A MIDIFile full of chords, with duplicated notes and events at the same ticks"""
+    # deinterleave=False as the converter always used it (de-interleaving can't handle overlapping repeats)
+    midi = MIDIFile(tracks, deinterleave=False)
+    midi.addTempo(0, 0, rng.choice((90, 120, 128)))
+    for track in range(tracks):
+        midi.addTrackName(track, 0, f"Track {track}")
+        channel = track
+        for _ in range(chords):
+            time = rng.randrange(64) / 4
+            for pitch in rng.sample(range(36, 84), rng.randint(1, 6)):
+                duration = rng.choice((0.25, 0.5, 1, 2))
+                volume = rng.randint(1, 127)
+                midi.addNote(track, channel, pitch, time, duration, volume)
+                if rng.random() < 0.3:
+                    # The same note again, sometimes with another velocity
+                    midi.addNote(track, channel, pitch, time, duration, rng.choice((volume, 100)))
+            if rng.random() < 0.2:
+                midi.addProgramChange(track, channel, time, rng.randrange(4))
+            if rng.random() < 0.3:
+                for _ in range(rng.randint(1, 3)):
+                    midi.addControllerEvent(track, channel, time, rng.choice((1, 7, 11)), rng.randrange(128))
+            if rng.random() < 0.2:
+                midi.addPitchWheelEvent(track, channel, time, rng.choice((-8192, 0, 4096)))
+    return midi
+
+
+def midi_bytes(seed, remove_duplicates):
+    original = MIDITrack.removeDuplicates
+    MIDITrack.removeDuplicates = remove_duplicates
+    try:
+        output = io.BytesIO()
+        random_midi_file(random.Random(seed)).writeFile(output)
+    finally:
+        MIDITrack.removeDuplicates = original
+    return output.getvalue()
+
+
+def test_remove_duplicates_matches_set():
+    """Sort-and-sweep deduplication writes the bytes set() deduplication did"""
+    for seed in range(25):
+        expected = midi_bytes(seed, set_remove_duplicates)
+        actual = midi_bytes(seed, MIDITrack.removeDuplicates)
+        assert actual == expected, f"seed {seed}: removeDuplicates() output differs from set()"
+    print("  ✓ 25 random chord-heavy files identical")
+
+
+if __name__ == '__main__':
+    test_remove_duplicates_matches_set()
@@ -34,6 +34,7 @@ __all__ = ['MIDIFile', 'MAJOR', 'MINOR', 'SHARPS', 'FLATS']
 class GenericEvent(object):
     evtname = None
     sec_sort_order = 0
+    __slots__ = ('tick', 'insertion_order')
 
     def __init__(self, tick, insertion_order):
         self.tick = tick
@@ -42,6 +43,14 @@ class GenericEvent(object):
     def __eq__(self, other):
         return (self.evtname == other.evtname and self.tick == other.tick)
 
+    def dedupKey(self):
+        # Events at the same tick are equal when their dedupKey()s match;
+        # None means the event never equals another one
+        return (self.evtname,)
+
+    def serializeInto(self, midibytes, previous_event_tick):
+        midibytes += self.serialize(previous_event_tick)
+
     def __hash__(self):
         a = int(self.tick)
         a = (a + 0x7ed55d16) + (a << 12)
@@ -57,6 +66,7 @@ class NoteOn(GenericEvent):
     evtname = 'NoteOn'
     midi_status = 0x90
     sec_sort_order = 3
+    __slots__ = ('pitch', 'duration', 'volume', 'channel', 'annotation')
 
     def __init__(self, channel, pitch, tick, duration, volume,
                  annotation=None, insertion_order=0):
@@ -65,7 +75,9 @@ class NoteOn(GenericEvent):
         self.volume = volume
         self.channel = channel
         self.annotation = annotation
-        super(NoteOn, self).__init__(tick, insertion_order)
+        # Set directly rather than via GenericEvent.__init__: notes are the bulk of all events
+        self.tick = tick
+        self.insertion_order = insertion_order
 
     def __eq__(self, other):
         return (self.evtname == other.evtname and self.tick == other.tick and
@@ -73,26 +85,30 @@ class NoteOn(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return (self.evtname, self.pitch, self.channel)
+
     def __str__(self):
         return 'NoteOn %d at tick %d duration %d ch %d vel %d' % (
             self.pitch, self.tick, self.duration, self.channel, self.volume)
 
     def serialize(self, previous_event_tick):
-        midibytes = b""
-        code = self.midi_status | self.channel
-        varTime = writeVarLength(self.tick - previous_event_tick)
-        for timeByte in varTime:
-            midibytes += struct.pack('>B', timeByte)
-        midibytes += struct.pack('>B', code)
-        midibytes += struct.pack('>B', self.pitch)
-        midibytes += struct.pack('>B', self.volume)
-        return midibytes
+        midibytes = bytearray()
+        self.serializeInto(midibytes, previous_event_tick)
+        return bytes(midibytes)
+
+    def serializeInto(self, midibytes, previous_event_tick):
+        appendVarLength(midibytes, self.tick - previous_event_tick)
+        midibytes.append(self.midi_status | self.channel)
+        midibytes.append(self.pitch)
+        midibytes.append(self.volume)
 
 
 class NoteOff (GenericEvent):
     evtname = 'NoteOff'
     midi_status = 0x80
     sec_sort_order = 2
+    __slots__ = ('pitch', 'volume', 'channel', 'annotation')
 
     def __init__(self, channel, pitch, tick, volume,
                  annotation=None, insertion_order=0):
@@ -100,7 +116,9 @@ class NoteOff (GenericEvent):
         self.volume = volume
         self.channel = channel
         self.annotation = annotation
-        super(NoteOff, self).__init__(tick, insertion_order)
+        # Set directly rather than via GenericEvent.__init__: notes are the bulk of all events
+        self.tick = tick
+        self.insertion_order = insertion_order
 
     def __eq__(self, other):
         return (self.evtname == other.evtname and self.tick == other.tick and
@@ -108,25 +126,29 @@ class NoteOff (GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return (self.evtname, self.pitch, self.channel)
+
     def __str__(self):
         return 'NoteOff %d at tick %d ch %d vel %d' % (
             self.pitch, self.tick, self.channel, self.volume)
 
     def serialize(self, previous_event_tick):
-        midibytes = b""
-        code = self.midi_status | self.channel
-        varTime = writeVarLength(self.tick - previous_event_tick)
-        for timeByte in varTime:
-            midibytes += struct.pack('>B', timeByte)
-        midibytes += struct.pack('>B', code)
-        midibytes += struct.pack('>B', self.pitch)
-        midibytes += struct.pack('>B', self.volume)
-        return midibytes
+        midibytes = bytearray()
+        self.serializeInto(midibytes, previous_event_tick)
+        return bytes(midibytes)
+
+    def serializeInto(self, midibytes, previous_event_tick):
+        appendVarLength(midibytes, self.tick - previous_event_tick)
+        midibytes.append(self.midi_status | self.channel)
+        midibytes.append(self.pitch)
+        midibytes.append(self.volume)
 
 
 class Tempo(GenericEvent):
     evtname = 'Tempo'
     sec_sort_order = 3
+    __slots__ = ('tempo',)
 
     def __init__(self, tick, tempo, insertion_order=0):
         self.tempo = int(60000000 / tempo)
@@ -139,6 +161,9 @@ class Tempo(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return (self.evtname, self.tempo)
+
     def serialize(self, previous_event_tick):
         midibytes = b""
         code = 0xFF
@@ -158,6 +183,7 @@ class Tempo(GenericEvent):
 class Copyright(GenericEvent):
     evtname = 'Copyright'
     sec_sort_order = 1
+    __slots__ = ('notice',)
 
     def __init__(self, tick, notice, insertion_order=0):
         self.notice = notice.encode("ISO-8859-1")
@@ -183,6 +209,7 @@ class Copyright(GenericEvent):
 class Text(GenericEvent):
     evtname = 'Text'
     sec_sort_order = 1
+    __slots__ = ('text',)
 
     def __init__(self, tick, text, insertion_order=0):
         self.text = text.encode("ISO-8859-1")
@@ -208,6 +235,7 @@ class Text(GenericEvent):
 class KeySignature(GenericEvent):
     evtname = 'KeySignature'
     sec_sort_order = 1
+    __slots__ = ('accidentals', 'accidental_type', 'mode')
 
     def __init__(self, tick, accidentals, accidental_type, mode,
                  insertion_order=0):
@@ -236,6 +264,7 @@ class ProgramChange(GenericEvent):
     evtname = 'ProgramChange'
     midi_status = 0xc0
     sec_sort_order = 1
+    __slots__ = ('programNumber', 'channel')
 
     def __init__(self, channel, tick, programNumber,
                  insertion_order=0):
@@ -251,6 +280,9 @@ class ProgramChange(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return (self.evtname, self.programNumber, self.channel)
+
     def serialize(self, previous_event_tick):
         midibytes = b""
         code = self.midi_status | self.channel
@@ -265,6 +297,7 @@ class ProgramChange(GenericEvent):
 class SysExEvent(GenericEvent):
     evtname = 'SysEx'
     sec_sort_order = 1
+    __slots__ = ('manID', 'payload')
 
     def __init__(self, tick, manID, payload, insertion_order=0):
         self.manID = manID
@@ -276,6 +309,9 @@ class SysExEvent(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return None
+
     def serialize(self, previous_event_tick):
         midibytes = b""
         code = 0xF0
@@ -297,6 +333,7 @@ class SysExEvent(GenericEvent):
 class UniversalSysExEvent(GenericEvent):
     evtname = 'UniversalSysEx'
     sec_sort_order = 1
+    __slots__ = ('realTime', 'sysExChannel', 'code', 'subcode', 'payload')
 
     def __init__(self, tick, realTime, sysExChannel, code, subcode,
                  payload, insertion_order=0):
@@ -312,6 +349,9 @@ class UniversalSysExEvent(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return None
+
     def serialize(self, previous_event_tick):
         midibytes = b""
         code = 0xF0
@@ -341,6 +381,7 @@ class ControllerEvent(GenericEvent):
     evtname = 'ControllerEvent'
     midi_status = 0xB0
     sec_sort_order = 1
+    __slots__ = ('parameter', 'channel', 'controller_number')
 
     def __init__(self, channel, tick, controller_number, parameter,
                  insertion_order=0):
@@ -354,22 +395,26 @@ class ControllerEvent(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return None
+
     def serialize(self, previous_event_tick):
-        midibytes = b""
-        code = self.midi_status | self.channel
-        varTime = writeVarLength(self.tick - previous_event_tick)
-        for timeByte in varTime:
-            midibytes += struct.pack('>B', timeByte)
-        midibytes += struct.pack('>B', code)
-        midibytes += struct.pack('>B', self.controller_number)
-        midibytes += struct.pack('>B', self.parameter)
-        return midibytes
+        midibytes = bytearray()
+        self.serializeInto(midibytes, previous_event_tick)
+        return bytes(midibytes)
+
+    def serializeInto(self, midibytes, previous_event_tick):
+        appendVarLength(midibytes, self.tick - previous_event_tick)
+        midibytes.append(self.midi_status | self.channel)
+        midibytes.append(self.controller_number)
+        midibytes.append(self.parameter)
 
 
 class ChannelPressureEvent(GenericEvent):
     evtname = 'ChannelPressure'
     midi_status = 0xD0
     sec_sort_order = 1
+    __slots__ = ('channel', 'pressure_value')
 
     def __init__(self, channel, tick, pressure_value, insertion_order=0):
         self.channel = channel
@@ -384,6 +429,9 @@ class ChannelPressureEvent(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return (self.evtname, self.pressure_value, self.channel)
+
     def serialize(self, previous_event_tick):
         midibytes = b""
         code = self.midi_status | self.channel
@@ -399,6 +447,7 @@ class PitchWheelEvent(GenericEvent):
     evtname = 'PitchWheelEvent'
     midi_status = 0xE0
     sec_sort_order = 1
+    __slots__ = ('channel', 'pitch_wheel_value')
 
     def __init__(self, channel, tick, pitch_wheel_value, insertion_order=0):
         self.channel = channel
@@ -410,23 +459,27 @@ class PitchWheelEvent(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return None
+
     def serialize(self, previous_event_tick):
-        midibytes = b""
-        code = self.midi_status | self.channel
-        varTime = writeVarLength(self.tick - previous_event_tick)
-        for timeByte in varTime:
-            midibytes = midibytes + struct.pack('>B', timeByte)
+        midibytes = bytearray()
+        self.serializeInto(midibytes, previous_event_tick)
+        return bytes(midibytes)
+
+    def serializeInto(self, midibytes, previous_event_tick):
+        appendVarLength(midibytes, self.tick - previous_event_tick)
         MSB = (self.pitch_wheel_value + 8192) >> 7
         LSB = (self.pitch_wheel_value + 8192) & 0x7F
-        midibytes = midibytes + struct.pack('>B', code)
-        midibytes = midibytes + struct.pack('>B', LSB)
-        midibytes = midibytes + struct.pack('>B', MSB)
-        return midibytes
+        midibytes.append(self.midi_status | self.channel)
+        midibytes.append(LSB)
+        midibytes.append(MSB)
 
 
 class TrackName(GenericEvent):
     evtname = 'TrackName'
     sec_sort_order = 0
+    __slots__ = ('trackName',)
 
     def __init__(self, tick, trackName, insertion_order=0):
         self.trackName = trackName.encode("ISO-8859-1")
@@ -439,6 +492,9 @@ class TrackName(GenericEvent):
 
     __hash__ = GenericEvent.__hash__
 
+    def dedupKey(self):
+        return (self.evtname, self.trackName)
+
     def serialize(self, previous_event_tick):
         midibytes = b""
         varTime = writeVarLength(self.tick - previous_event_tick)
@@ -457,6 +513,7 @@ class TrackName(GenericEvent):
 class TimeSignature(GenericEvent):
     evtname = 'TimeSignature'
     sec_sort_order = 0
+    __slots__ = ('numerator', 'denominator', 'clocks_per_tick', 'notes_per_quarter')
 
     def __init__(self, tick, numerator, denominator, clocks_per_tick,
                  notes_per_quarter, insertion_order=0):
@@ -487,7 +544,7 @@ class MIDITrack(object):
     def __init__(self, removeDuplicates, deinterleave):
         self.headerString = struct.pack('cccc', b'M', b'T', b'r', b'k')
         self.dataLength = 0
-        self.MIDIdata = b""
+        self.MIDIdata = bytearray()
         self.closed = False
         self.eventList = []
         self.MIDIEventList = []
@@ -573,17 +630,36 @@ class MIDITrack(object):
         self.eventList.append(UniversalSysExEvent(0, realTime, sysExChannel,
                                                   8, 2, payload, insertion_order=insertion_order))
 
-    def processEventList(self):
+    def processEventList(self, presorted=False):
         self.MIDIEventList = [evt for evt in self.eventList]
-        self.MIDIEventList.sort(key=sort_events)
+        if not presorted:
+            self.MIDIEventList.sort(key=sort_events)
 
         if self.deinterleave:
             self.deInterleaveNotes()
 
     def removeDuplicates(self):
-        s = set(self.eventList)
-        self.eventList = list(s)
-        self.eventList.sort(key=sort_events)
+        # Sort once, then sweep: duplicates share a tick and sec_sort_order,
+        # so a small set of keys per run of such events is enough. The first
+        # copy of a duplicate is kept and the result stays sorted.
+        events = sorted(self.eventList, key=sort_events)
+        deduped = []
+        run = None
+        seen = set()
+        for event in events:
+            key = event.dedupKey()
+            if key is None:
+                deduped.append(event)
+                continue
+            event_run = (event.tick, event.sec_sort_order)
+            if event_run != run:
+                run = event_run
+                seen.clear()
+            elif key in seen:
+                continue
+            seen.add(key)
+            deduped.append(event)
+        self.eventList = deduped
 
     def closeTrack(self):
         if self.closed:
@@ -593,7 +669,7 @@ class MIDITrack(object):
         if self.remdep:
             self.removeDuplicates()
 
-        self.processEventList()
+        self.processEventList(presorted=self.remdep)
 
     def writeMIDIStream(self):
         self.writeEventsToStream()
@@ -601,9 +677,11 @@ class MIDITrack(object):
         self.dataLength = struct.pack('>L', len(self.MIDIdata))
 
     def writeEventsToStream(self):
+        # All events append into the one bytearray - no per-event bytes copies
         previous_event_tick = 0
+        midibytes = self.MIDIdata
         for event in self.MIDIEventList:
-            self.MIDIdata += event.serialize(previous_event_tick)
+            event.serializeInto(midibytes, previous_event_tick)
 
     def deInterleaveNotes(self):
         tempEventList = []
@@ -908,8 +986,8 @@ class MIDIFile(object):
             return
 
         for i in range(0, self.numTracks):
+            # closeTrack() leaves MIDIEventList sorted
             self.tracks[i].closeTrack()
-            self.tracks[i].MIDIEventList.sort(key=sort_events)
 
         origin = self.findOrigin()
 
@@ -944,6 +1022,22 @@ def writeVarLength(i):
     return vlbytes
 
 
+def appendVarLength(midibytes, i):
+    """Append the variable-length encoding of i to a bytearray (same bytes as writeVarLength)"""
+    if i < 0x80:
+        if i >= 0:
+            midibytes.append(i)
+        return
+
+    vlbytes = [i & 0x7f]
+    i >>= 7
+    while i > 0:
+        vlbytes.append((i & 0x7f) | 0x80)
+        i >>= 7
+    vlbytes.reverse()
+    midibytes.extend(vlbytes)
+
+
 def readVarLength(offset, buffer):
     toffset = offset
     output = 0